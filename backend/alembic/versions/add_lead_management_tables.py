@@ -17,11 +17,14 @@ depends_on = None
 
 
 def upgrade():
+    # gen_random_uuid() for the native UUID columns (built in since PG 13, pgcrypto before)
+    op.execute("CREATE EXTENSION IF NOT EXISTS pgcrypto")
+    
     # Create leads table (simplified without foreign keys to non-existent tables)
     op.create_table(
         'leads',
         sa.Column('id', sa.Integer(), nullable=False),
-        sa.Column('uuid', sa.String(36), nullable=False),
+        sa.Column('uuid', postgresql.UUID(as_uuid=True), nullable=False, server_default=sa.text('gen_random_uuid()')),
         sa.Column('organization_id', sa.Integer(), nullable=False),
         sa.Column('created_by_user_id', sa.Integer(), nullable=True),
         
@@ -71,16 +74,20 @@ def upgrade():
     op.create_index('ix_leads_organization_id', 'leads', ['organization_id'])
     op.create_index('ix_leads_phone', 'leads', ['phone'])
     op.create_index('ix_leads_email', 'leads', ['email'])
-    op.create_index('ix_leads_status', 'leads', ['status'])
-    op.create_index('ix_leads_score_category', 'leads', ['score_category'])
-    op.create_index('ix_leads_lead_score', 'leads', ['lead_score'])
+    # Partial indexes: most rows carry the server default, so only index the rest
+    op.create_index('ix_leads_status', 'leads', ['status'],
+                    postgresql_where=sa.text("status <> 'new'"))
+    # Prioritisation queries (category filter, ORDER BY lead_score DESC) on open leads
+    op.create_index('ix_leads_category_score', 'leads',
+                    ['score_category', sa.text('lead_score DESC'), 'organization_id'],
+                    postgresql_where=sa.text("status NOT IN ('converted', 'lost')"))
     op.create_index('ix_leads_last_contact_date', 'leads', ['last_contact_date'])
     
     # Create lead_activities table (simplified)
     op.create_table(
         'lead_activities',
         sa.Column('id', sa.Integer(), nullable=False),
-        sa.Column('uuid', sa.String(36), nullable=False),
+        sa.Column('uuid', postgresql.UUID(as_uuid=True), nullable=False, server_default=sa.text('gen_random_uuid()')),
         sa.Column('lead_id', sa.Integer(), nullable=False),
         sa.Column('activity_type', sa.String(50), nullable=False),
         sa.Column('description', sa.Text(), nullable=True),
@@ -95,13 +102,15 @@ def upgrade():
     # Create indexes for lead_activities
     op.create_index('ix_lead_activities_lead_id', 'lead_activities', ['lead_id'])
     op.create_index('ix_lead_activities_activity_type', 'lead_activities', ['activity_type'])
-    op.create_index('ix_lead_activities_created_at', 'lead_activities', ['created_at'])
+    # Append-only timestamp: BRIN is a fraction of the size of a B-tree here
+    op.create_index('ix_lead_activities_created_at_brin', 'lead_activities', ['created_at'],
+                    postgresql_using='brin', postgresql_with={'pages_per_range': 32})
     
     # Create follow_ups table (simplified)
     op.create_table(
         'follow_ups',
         sa.Column('id', sa.Integer(), nullable=False),
-        sa.Column('uuid', sa.String(36), nullable=False),
+        sa.Column('uuid', postgresql.UUID(as_uuid=True), nullable=False, server_default=sa.text('gen_random_uuid()')),
         sa.Column('lead_id', sa.Integer(), nullable=False),
         sa.Column('scheduled_date', sa.DateTime(timezone=True), nullable=False),
         sa.Column('completed_date', sa.DateTime(timezone=True), nullable=True),
@@ -120,10 +129,35 @@ def upgrade():
     
     # Create indexes for follow_ups
     op.create_index('ix_follow_ups_lead_id', 'follow_ups', ['lead_id'])
-    op.create_index('ix_follow_ups_scheduled_date', 'follow_ups', ['scheduled_date'])
-    op.create_index('ix_follow_ups_status', 'follow_ups', ['status'])
+    # Covering partial index for the scheduler's "due pending follow-ups" query
+    op.create_index('ix_follow_ups_due', 'follow_ups', ['scheduled_date'],
+                    postgresql_include=['lead_id', 'priority'],
+                    postgresql_where=sa.text("status = 'pending'"))
     op.create_index('ix_follow_ups_priority', 'follow_ups', ['priority'])
     
+    # Secondary indexes on leads are built outside the migration transaction so
+    # large existing tables are neither locked nor held in one giant transaction.
+    with op.get_context().autocommit_block():
+        # GIN indexes for containment lookups (enrichment_data @> '{...}', tags @> ARRAY[...])
+        # jsonb_path_ops is smaller than the default jsonb_ops and only serves @>, which is all we need
+        op.execute("CREATE INDEX CONCURRENTLY ix_leads_enrichment_data_gin ON leads USING GIN (enrichment_data jsonb_path_ops)")
+        op.execute("CREATE INDEX CONCURRENTLY ix_leads_custom_fields_gin ON leads USING GIN (custom_fields jsonb_path_ops)")
+        op.execute("CREATE INDEX CONCURRENTLY ix_leads_tags_gin ON leads USING GIN (tags)")
+
+        # Expression indexes for the hot scalar paths written by LeadEnrichmentService
+        op.execute(
+            "CREATE INDEX CONCURRENTLY ix_leads_enrichment_industry ON leads ((enrichment_data->'company'->>'industry')) "
+            "WHERE enrichment_data->'company'->>'industry' IS NOT NULL"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY ix_leads_enrichment_company_size ON leads ((enrichment_data->'company'->>'size')) "
+            "WHERE enrichment_data->'company'->>'size' IS NOT NULL"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY ix_leads_enrichment_city ON leads ((enrichment_data->>'city')) "
+            "WHERE enrichment_data ? 'city'"
+        )
+
     # Skip adding columns to other tables that might not exist
     pass
 
@@ -147,21 +181,25 @@ def downgrade():
     
     # Drop follow_ups
     op.drop_index('ix_follow_ups_priority', 'follow_ups')
-    op.drop_index('ix_follow_ups_status', 'follow_ups')
-    op.drop_index('ix_follow_ups_scheduled_date', 'follow_ups')
+    op.drop_index('ix_follow_ups_due', 'follow_ups')
     op.drop_index('ix_follow_ups_lead_id', 'follow_ups')
     op.drop_table('follow_ups')
     
     # Drop lead_activities
-    op.drop_index('ix_lead_activities_created_at', 'lead_activities')
+    op.drop_index('ix_lead_activities_created_at_brin', 'lead_activities')
     op.drop_index('ix_lead_activities_activity_type', 'lead_activities')
     op.drop_index('ix_lead_activities_lead_id', 'lead_activities')
     op.drop_table('lead_activities')
     
     # Drop leads
+    op.drop_index('ix_leads_enrichment_city', 'leads')
+    op.drop_index('ix_leads_enrichment_company_size', 'leads')
+    op.drop_index('ix_leads_enrichment_industry', 'leads')
+    op.drop_index('ix_leads_tags_gin', 'leads')
+    op.drop_index('ix_leads_custom_fields_gin', 'leads')
+    op.drop_index('ix_leads_enrichment_data_gin', 'leads')
     op.drop_index('ix_leads_last_contact_date', 'leads')
-    op.drop_index('ix_leads_lead_score', 'leads')
-    op.drop_index('ix_leads_score_category', 'leads')
+    op.drop_index('ix_leads_category_score', 'leads')
     op.drop_index('ix_leads_status', 'leads')
     op.drop_index('ix_leads_email', 'leads')
     op.drop_index('ix_leads_phone', 'leads')
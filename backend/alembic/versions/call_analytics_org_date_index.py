@@ -0,0 +1,40 @@
+"""Composite (organization_id, date) index on call_analytics
+
+Revision ID: call_analytics_org_date_index
+Revises: server_side_timestamps
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'call_analytics_org_date_index'
+down_revision = 'server_side_timestamps'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CONCURRENTLY cannot run inside the migration transaction
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_call_analytics_org_date "
+            "ON call_analytics (organization_id, date)"
+        )
+        # Superseded by the composite index (leftmost column) / never looked up
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_call_analytics_org_date")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_call_analytics_organization_id")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_call_analytics_uuid")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_call_analytics_uuid "
+            "ON call_analytics (uuid)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_call_analytics_organization_id "
+            "ON call_analytics (organization_id)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_call_analytics_org_date")
@@ -0,0 +1,61 @@
+"""JSONB + GIN for company_call_logs.actions_taken and users.preferences
+
+Revision ID: jsonb_actions_preferences
+Revises: lz4_text_columns
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'jsonb_actions_preferences'
+down_revision = 'lz4_text_columns'
+branch_labels = None
+depends_on = None
+
+# (table, column, index name)
+CONTAINMENT_COLUMNS = (
+    ('company_call_logs', 'actions_taken', 'ix_company_call_logs_actions_gin'),
+    ('users', 'preferences', 'ix_users_preferences_gin'),
+)
+
+
+def _existing(inspector):
+    tables = set(inspector.get_table_names())
+    for table, column, index_name in CONTAINMENT_COLUMNS:
+        if table not in tables:
+            continue
+        column_types = {c['name']: c['type'] for c in inspector.get_columns(table)}
+        if column in column_types:
+            yield table, column, index_name, column_types[column]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    columns = list(_existing(inspector))
+
+    for table, column, _, column_type in columns:
+        if not isinstance(column_type, postgresql.JSONB):
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE jsonb USING {column}::jsonb")
+
+    # CONCURRENTLY cannot run inside the migration transaction
+    with op.get_context().autocommit_block():
+        for table, column, index_name, _ in columns:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} "
+                f"ON {table} USING gin ({column} jsonb_path_ops)"
+            )
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    columns = list(_existing(inspector))
+
+    with op.get_context().autocommit_block():
+        for _, _, index_name, _ in columns:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
+
+    for table, column, _, _ in columns:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE json USING {column}::json")
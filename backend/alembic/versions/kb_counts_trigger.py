@@ -0,0 +1,65 @@
+"""Maintain knowledge base counters with a trigger on documents
+
+Revision ID: kb_counts_trigger
+Revises: jsonb_actions_preferences
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'kb_counts_trigger'
+down_revision = 'jsonb_actions_preferences'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'documents' not in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.execute("""
+    CREATE OR REPLACE FUNCTION update_kb_counts() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP <> 'INSERT' AND OLD.processing_status = 'completed' THEN
+            UPDATE knowledge_bases
+               SET document_count = document_count - 1,
+                   total_chunks = total_chunks - OLD.chunk_count,
+                   last_updated = now()
+             WHERE id = OLD.knowledge_base_id;
+        END IF;
+        IF TG_OP <> 'DELETE' AND NEW.processing_status = 'completed' THEN
+            UPDATE knowledge_bases
+               SET document_count = document_count + 1,
+                   total_chunks = total_chunks + NEW.chunk_count,
+                   last_updated = now()
+             WHERE id = NEW.knowledge_base_id;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """)
+    op.execute("DROP TRIGGER IF EXISTS docs_count_trg ON documents")
+    op.execute("""
+    CREATE TRIGGER docs_count_trg
+    AFTER INSERT OR DELETE OR UPDATE OF processing_status, chunk_count, knowledge_base_id
+    ON documents
+    FOR EACH ROW EXECUTE FUNCTION update_kb_counts()
+    """)
+
+    # Resync counters drifted by the previous app-level read-modify-write updates
+    op.execute("""
+    UPDATE knowledge_bases kb
+       SET document_count = (
+               SELECT COUNT(*) FROM documents d
+                WHERE d.knowledge_base_id = kb.id AND d.processing_status = 'completed'),
+           total_chunks = (
+               SELECT COALESCE(SUM(d.chunk_count), 0) FROM documents d
+                WHERE d.knowledge_base_id = kb.id AND d.processing_status = 'completed')
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS docs_count_trg ON documents")
+    op.execute("DROP FUNCTION IF EXISTS update_kb_counts()")
@@ -0,0 +1,68 @@
+"""Store transcripts as TEXT with LZ4 TOAST compression
+
+Revision ID: lz4_text_columns
+Revises: call_analytics_org_date_index
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'lz4_text_columns'
+down_revision = 'call_analytics_org_date_index'
+branch_labels = None
+depends_on = None
+
+# Large free-text columns: (table, column)
+LARGE_TEXT_COLUMNS = (
+    ('company_call_logs', 'transcript'),
+    ('call_logs', 'transcription'),
+    ('call_logs', 'ai_summary'),
+    ('conversations', 'content'),
+)
+
+
+def _existing(inspector):
+    tables = set(inspector.get_table_names())
+    for table, column in LARGE_TEXT_COLUMNS:
+        if table in tables and column in {c['name'] for c in inspector.get_columns(table)}:
+            yield table, column
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    columns = list(_existing(inspector))
+
+    for table, column in columns:
+        if table == 'company_call_logs':
+            # JSON -> TEXT: unwrap JSON strings, keep other values as their JSON text
+            op.execute(
+                f"ALTER TABLE {table} ALTER COLUMN {column} TYPE text USING {column} #>> '{{}}'"
+            )
+        else:
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE text")
+        # EXTENDED = compress, then move out of line (PostgreSQL default for text, made explicit)
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET STORAGE EXTENDED")
+
+    # Applies to newly written values; existing rows keep pglz until rewritten
+    if bind.dialect.server_version_info >= (14,):
+        for table, column in columns:
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET COMPRESSION lz4")
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    columns = list(_existing(inspector))
+
+    if bind.dialect.server_version_info >= (14,):
+        for table, column in columns:
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET COMPRESSION pglz")
+
+    for table, column in columns:
+        if table == 'company_call_logs':
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE json USING to_json({column})")
+        else:
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE varchar")
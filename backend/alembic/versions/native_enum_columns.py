@@ -0,0 +1,77 @@
+"""Native PostgreSQL ENUM types for status/role columns
+
+Revision ID: native_enum_columns
+Revises: unique_confirmation_code
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'native_enum_columns'
+down_revision = 'unique_confirmation_code'
+branch_labels = None
+depends_on = None
+
+# SQLAlchemy stores enum member NAMES; type names match what create_all emits
+ENUM_TYPES = {
+    'subscriptionplan': ('FREE', 'STARTER', 'PROFESSIONAL', 'ENTERPRISE'),
+    'voicepersonality': ('PROFESSIONAL', 'FRIENDLY', 'CASUAL', 'FORMAL'),
+    'userrole': ('ADMIN', 'MANAGER', 'AGENT', 'USER'),
+    'userstatus': ('ACTIVE', 'INACTIVE', 'SUSPENDED'),
+    'callstatus': ('INITIATED', 'RINGING', 'ANSWERED', 'IN_PROGRESS', 'COMPLETED', 'FAILED', 'CANCELLED'),
+    'calldirection': ('INBOUND', 'OUTBOUND'),
+    'conversationrole': ('USER', 'ASSISTANT', 'SYSTEM'),
+}
+
+# (table, column, enum type)
+ENUM_COLUMNS = (
+    ('companies', 'subscription_plan', 'subscriptionplan'),
+    ('companies', 'voice_personality', 'voicepersonality'),
+    ('users', 'role', 'userrole'),
+    ('users', 'status', 'userstatus'),
+    ('call_logs', 'status', 'callstatus'),
+    ('call_logs', 'direction', 'calldirection'),
+    ('conversations', 'role', 'conversationrole'),
+)
+
+
+def _varchar_columns(inspector):
+    """Enum columns that still hold plain strings (tables created outside create_all)."""
+    tables = set(inspector.get_table_names())
+    for table, column, type_name in ENUM_COLUMNS:
+        if table not in tables:
+            continue
+        column_types = {c['name']: c['type'] for c in inspector.get_columns(table)}
+        if column in column_types and not isinstance(column_types[column], sa.Enum):
+            yield table, column, type_name
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    pending = list(_varchar_columns(inspector))
+    if not pending:
+        return
+
+    for type_name in sorted({type_name for _, _, type_name in pending}):
+        labels = ", ".join(f"'{label}'" for label in ENUM_TYPES[type_name])
+        op.execute(f"""
+        DO $$ BEGIN
+            CREATE TYPE {type_name} AS ENUM ({labels});
+        EXCEPTION WHEN duplicate_object THEN NULL;
+        END $$
+        """)
+
+    for table, column, type_name in pending:
+        # upper() maps both stored values ('in_progress') and names ('IN_PROGRESS')
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} DROP DEFAULT")
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {column} "
+            f"TYPE {type_name} USING upper({column})::{type_name}"
+        )
+
+
+def downgrade():
+    # create_all has always emitted native ENUMs - keep them on downgrade
+    pass
@@ -0,0 +1,95 @@
+"""Store UUID keys as native uuid
+
+Revision ID: native_uuid_columns
+Revises: add_lead_management
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'native_uuid_columns'
+down_revision = 'add_lead_management'
+branch_labels = None
+depends_on = None
+
+# Tenant tables keyed by UUID strings: (table, [uuid columns])
+COMPANY_UUID_COLUMNS = (
+    ('companies', ['id']),
+    ('knowledge_bases', ['id', 'company_id']),
+    ('documents', ['id', 'knowledge_base_id']),
+    ('company_intents', ['id', 'company_id']),
+    ('appointments', ['id', 'company_id']),
+    ('company_call_logs', ['id', 'company_id']),
+)
+
+# Integer-keyed tables with a secondary public uuid column
+PUBLIC_UUID_TABLES = (
+    'organizations',
+    'users',
+    'phone_numbers',
+    'call_logs',
+    'conversations',
+    'call_analytics',
+    'api_keys',
+)
+
+# Foreign keys between the tenant tables; they must be dropped while both
+# sides change type and are recreated afterwards
+UUID_REFERENCED_TABLES = {'companies', 'knowledge_bases'}
+
+
+def _pending_columns(inspector, target_type):
+    """Yield (table, column) pairs that exist and are not yet ``target_type``."""
+    existing = set(inspector.get_table_names())
+    candidates = [*COMPANY_UUID_COLUMNS, *((table, ['uuid']) for table in PUBLIC_UUID_TABLES)]
+    for table, columns in candidates:
+        if table not in existing:
+            continue
+        column_types = {c['name']: c['type'] for c in inspector.get_columns(table)}
+        for column in columns:
+            if column in column_types and not isinstance(column_types[column], target_type):
+                yield table, column
+
+
+def _uuid_foreign_keys(inspector):
+    """Foreign keys pointing at the UUID-keyed tenant tables."""
+    existing = set(inspector.get_table_names())
+    for table, _ in COMPANY_UUID_COLUMNS:
+        if table not in existing:
+            continue
+        for fk in inspector.get_foreign_keys(table):
+            if fk['referred_table'] in UUID_REFERENCED_TABLES and fk.get('name'):
+                yield table, fk
+
+
+def _convert(target_type, sql_type):
+    # Tables are created by the app via create_all, so only touch what exists
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    pending = list(_pending_columns(inspector, target_type))
+    if not pending:
+        return
+
+    foreign_keys = list(_uuid_foreign_keys(inspector))
+    for table, fk in foreign_keys:
+        op.drop_constraint(fk['name'], table, type_='foreignkey')
+
+    for table, column in pending:
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN {column} TYPE {sql_type} USING {column}::{sql_type}')
+
+    for table, fk in foreign_keys:
+        op.create_foreign_key(
+            fk['name'], table, fk['referred_table'],
+            fk['constrained_columns'], fk['referred_columns'],
+        )
+
+
+def upgrade():
+    _convert(postgresql.UUID, 'uuid')
+
+
+def downgrade():
+    _convert(sa.String, 'varchar')
@@ -0,0 +1,42 @@
+"""Store lead table uuid columns as native uuid
+
+Revision ID: native_uuid_lead_columns
+Revises: pgcrypto_secrets
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'native_uuid_lead_columns'
+down_revision = 'pgcrypto_secrets'
+branch_labels = None
+depends_on = None
+
+# Lead tables built by create_all from the former str models (or by an older
+# add_lead_management) still carry VARCHAR uuid columns
+LEAD_UUID_TABLES = ('leads', 'lead_activities', 'follow_ups')
+
+
+def _pending_tables(target_type):
+    """Yield lead tables whose uuid column exists and is not yet ``target_type``."""
+    inspector = sa.inspect(op.get_bind())
+    existing = set(inspector.get_table_names())
+    for table in LEAD_UUID_TABLES:
+        if table not in existing:
+            continue
+        column_types = {c['name']: c['type'] for c in inspector.get_columns(table)}
+        if 'uuid' in column_types and not isinstance(column_types['uuid'], target_type):
+            yield table
+
+
+def upgrade():
+    for table in _pending_tables(postgresql.UUID):
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN uuid TYPE uuid USING uuid::uuid')
+
+
+def downgrade():
+    for table in _pending_tables(sa.String):
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN uuid TYPE varchar USING uuid::varchar')
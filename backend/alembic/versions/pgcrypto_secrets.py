@@ -0,0 +1,96 @@
+"""Encrypt stored secrets server-side with pgcrypto
+
+Revision ID: pgcrypto_secrets
+Revises: native_enum_columns
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import BYTEA
+
+# revision identifiers, used by Alembic.
+revision = 'pgcrypto_secrets'
+down_revision = 'native_enum_columns'
+branch_labels = None
+depends_on = None
+
+# Secret columns moved from VARCHAR to pgp_sym_encrypt()ed BYTEA: (table, column, key column)
+SECRET_COLUMNS = (
+    ('companies', 'twilio_auth_token_encrypted', 'id'),
+    ('api_keys', 'encrypted_key', 'id'),
+)
+
+
+def _encryption_key():
+    from api.core.config import get_settings
+    return get_settings().ENCRYPTION_KEY
+
+
+def _fernet_plaintext(value, key):
+    """api_keys rows may hold Fernet tokens from the old Python-side helper."""
+    from cryptography.fernet import Fernet, InvalidToken
+    try:
+        return Fernet(key.encode()).decrypt(value.encode()).decode()
+    except (InvalidToken, ValueError):
+        return value
+
+
+def _pending(inspector, type_check):
+    tables = set(inspector.get_table_names())
+    for table, column, pk in SECRET_COLUMNS:
+        if table not in tables:
+            continue
+        column_types = {c['name']: c['type'] for c in inspector.get_columns(table)}
+        if column in column_types and type_check(column_types[column]):
+            yield table, column, pk
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    key = _encryption_key()
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pgcrypto")
+
+    # The key is a bound parameter, so copy via UPDATE into a new column instead of
+    # ALTER ... USING (utility statements take no parameters)
+    for table, column, pk in _pending(inspector, lambda t: not isinstance(t, sa.LargeBinary)):
+        op.add_column(table, sa.Column(f'{column}_pgp', BYTEA()))
+        if table == 'api_keys':
+            # Fernet tokens can only be unwrapped in Python - one executemany
+            rows = bind.execute(sa.text(
+                f"SELECT {pk}, {column} FROM {table} WHERE {column} IS NOT NULL"
+            )).fetchall()
+            if rows:
+                bind.execute(
+                    sa.text(f"UPDATE {table} SET {column}_pgp = pgp_sym_encrypt(:value, :key) WHERE {pk} = :id"),
+                    [{'value': _fernet_plaintext(value, key), 'key': key, 'id': row_id} for row_id, value in rows],
+                )
+        else:
+            bind.execute(
+                sa.text(f"UPDATE {table} SET {column}_pgp = pgp_sym_encrypt({column}, :key) WHERE {column} IS NOT NULL"),
+                {'key': key},
+            )
+        op.drop_column(table, column)
+        op.alter_column(table, f'{column}_pgp', new_column_name=column)
+        if table == 'api_keys':
+            op.alter_column(table, column, nullable=False)
+
+
+def downgrade():
+    # Decrypts back to plaintext VARCHAR (the old Fernet wrapping is not restored)
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    key = _encryption_key()
+
+    for table, column, _ in _pending(inspector, lambda t: isinstance(t, sa.LargeBinary)):
+        op.add_column(table, sa.Column(f'{column}_plain', sa.String()))
+        bind.execute(
+            sa.text(f"UPDATE {table} SET {column}_plain = pgp_sym_decrypt({column}, :key)"),
+            {'key': key},
+        )
+        op.drop_column(table, column)
+        op.alter_column(table, f'{column}_plain', new_column_name=column)
+        if table == 'api_keys':
+            op.alter_column(table, column, nullable=False)
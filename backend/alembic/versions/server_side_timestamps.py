@@ -0,0 +1,80 @@
+"""Fill timestamps server-side with now()
+
+Revision ID: server_side_timestamps
+Revises: native_uuid_columns
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'server_side_timestamps'
+down_revision = 'native_uuid_columns'
+branch_labels = None
+depends_on = None
+
+# Insert timestamps that get DEFAULT now(): (table, [columns])
+SERVER_DEFAULT_COLUMNS = (
+    ('organizations', ['created_at']),
+    ('users', ['created_at']),
+    ('phone_numbers', ['created_at']),
+    ('call_logs', ['created_at']),
+    ('conversations', ['created_at']),
+    ('call_analytics', ['created_at']),
+    ('api_keys', ['created_at']),
+    ('system_config', ['created_at']),
+    ('companies', ['created_at', 'updated_at']),
+    ('knowledge_bases', ['last_updated']),
+    ('documents', ['uploaded_at']),
+    ('appointments', ['created_at', 'updated_at']),
+)
+
+# Company tables stored naive UTC (datetime.utcnow) - converted to timestamptz
+NAIVE_UTC_COLUMNS = (
+    ('companies', ['created_at', 'updated_at']),
+    ('knowledge_bases', ['last_updated']),
+    ('documents', ['uploaded_at']),
+    ('appointments', ['created_at', 'updated_at']),
+)
+
+
+def _existing(inspector, spec):
+    """Yield (table, column, type) for columns of ``spec`` present in the database."""
+    tables = set(inspector.get_table_names())
+    for table, columns in spec:
+        if table not in tables:
+            continue
+        column_types = {c['name']: c['type'] for c in inspector.get_columns(table)}
+        for column in columns:
+            if column in column_types:
+                yield table, column, column_types[column]
+
+
+def upgrade():
+    # Tables are created by the app via create_all, so only touch what exists
+    inspector = sa.inspect(op.get_bind())
+
+    for table, column, column_type in _existing(inspector, NAIVE_UTC_COLUMNS):
+        if not getattr(column_type, 'timezone', False):
+            op.execute(
+                f"ALTER TABLE {table} ALTER COLUMN {column} "
+                f"TYPE timestamptz USING {column} AT TIME ZONE 'UTC'"
+            )
+
+    for table, column, _ in _existing(inspector, SERVER_DEFAULT_COLUMNS):
+        op.alter_column(table, column, server_default=sa.func.now())
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    for table, column, _ in _existing(inspector, SERVER_DEFAULT_COLUMNS):
+        op.alter_column(table, column, server_default=None)
+
+    for table, column, column_type in _existing(inspector, NAIVE_UTC_COLUMNS):
+        if getattr(column_type, 'timezone', False):
+            op.execute(
+                f"ALTER TABLE {table} ALTER COLUMN {column} "
+                f"TYPE timestamp USING {column} AT TIME ZONE 'UTC'"
+            )
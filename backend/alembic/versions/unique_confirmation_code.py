@@ -0,0 +1,37 @@
+"""Unique appointments.confirmation_code
+
+Revision ID: unique_confirmation_code
+Revises: kb_counts_trigger
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'unique_confirmation_code'
+down_revision = 'kb_counts_trigger'
+branch_labels = None
+depends_on = None
+
+CONSTRAINT_NAME = 'appointments_confirmation_code_key'
+
+
+def upgrade():
+    if 'appointments' not in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    # Build the index without blocking writes, then attach it as the constraint
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {CONSTRAINT_NAME} "
+            "ON appointments (confirmation_code)"
+        )
+    op.execute(
+        f"ALTER TABLE appointments ADD CONSTRAINT {CONSTRAINT_NAME} "
+        f"UNIQUE USING INDEX {CONSTRAINT_NAME}"
+    )
+
+
+def downgrade():
+    op.execute(f"ALTER TABLE appointments DROP CONSTRAINT IF EXISTS {CONSTRAINT_NAME}")
@@ -2,6 +2,17 @@
 Voice Agent Scripts für Hotel und Business Use Cases
 Intelligente Routing und personalisierte Gesprächsführung
 """
+import sys
+from string import Formatter
+from types import MappingProxyType
+from typing import Dict, Optional, Tuple
+
+from api.config.frozen import freeze
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 # Hotel-spezifische Routing Keywords
 ROUTING_KEYWORDS = {
@@ -339,6 +350,119 @@ INTENT_PATTERNS = {
     'appointment': ['termin', 'treffen', 'meeting', 'besprechung', 'zeit']
 }
 
+# Statische Konfiguration read-only machen (Keywords werden interniert)
+ROUTING_KEYWORDS = freeze(ROUTING_KEYWORDS, intern_strings=True)
+AGENT_SCRIPTS = freeze(AGENT_SCRIPTS)
+INTENT_PATTERNS = freeze(INTENT_PATTERNS, intern_strings=True)
+
+
+# Keyword-Matching: alle Routing- und Intent-Keywords in einem Aho-Corasick-Automaten,
+# damit jede Äußerung in einem Durchlauf statt Kategorie × Keyword gescannt wird.
+# Priorität = Definitionsreihenfolge, Notfall-Keywords immer zuerst.
+def _build_keyword_index() -> Dict[str, Tuple[Tuple[int, str, str, str], ...]]:
+    entries: Dict[str, list] = {}
+    rank = 0
+    departments = ['emergency'] + [d for d in ROUTING_KEYWORDS if d != 'emergency']
+    sources = [('routing', dept, ROUTING_KEYWORDS[dept]['keywords']) for dept in departments]
+    sources += [('intent', intent, keywords) for intent, keywords in INTENT_PATTERNS.items()]
+    for kind, category, keywords in sources:
+        for keyword in keywords:
+            entries.setdefault(sys.intern(keyword.lower()), []).append((rank, kind, category, keyword))
+            rank += 1
+    return {keyword: tuple(payloads) for keyword, payloads in entries.items()}
+
+
+_KEYWORD_INDEX = _build_keyword_index()
+
+
+def _build_automaton():
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for keyword, payloads in _KEYWORD_INDEX.items():
+        automaton.add_word(keyword, payloads)
+    automaton.make_automaton()
+    return automaton
+
+
+_AC = _build_automaton()
+
+
+def _iter_keyword_hits(text: str):
+    if _AC is not None:
+        for _, payloads in _AC.iter(text):
+            yield from payloads
+    else:
+        # Fallback ohne pyahocorasick: linearer Substring-Scan
+        for keyword, payloads in _KEYWORD_INDEX.items():
+            if keyword in text:
+                yield from payloads
+
+
+def match_intents(text: str, kind: str = 'routing') -> Optional[Tuple[str, str]]:
+    """
+    Findet das Keyword mit der höchsten Priorität in einer Äußerung
+    
+    Args:
+        text: Äußerung des Anrufers
+        kind: 'routing' (ROUTING_KEYWORDS) oder 'intent' (INTENT_PATTERNS)
+    
+    Returns:
+        (Kategorie, Keyword) oder None
+    """
+    best = None
+    for payload in _iter_keyword_hits(text.lower()):
+        if payload[1] == kind and (best is None or payload[0] < best[0]):
+            best = payload
+    if best is None:
+        return None
+    return best[2], best[3]
+
+
+# Standardwerte für fehlende Kontext-Werte
+_DEFAULTS = MappingProxyType({
+    'name': 'Kunde',
+    'agent_name': 'Ihr KI-Assistent',
+    'company': 'VocalIQ',
+    'hotel_name': 'Hotel Alpenblick',
+    'topic': 'unser Angebot',
+    'product': 'unsere Lösung'
+})
+
+_MISSING = object()
+
+
+# Vorkompilierte Templates: jedes Script wird einmal beim Import zerlegt,
+# damit generate_personalized_script nicht bei jedem Aufruf neu parst.
+def _compile_template(template: str) -> Tuple[Tuple[str, Optional[str], str, Optional[str]], ...]:
+    return tuple(Formatter().parse(template))
+
+
+def _render_template(parts, context: dict) -> str:
+    chunks = []
+    for literal, field_name, format_spec, conversion in parts:
+        chunks.append(literal)
+        if field_name is None:
+            continue
+        value = context.get(field_name, _MISSING)
+        if value is _MISSING:
+            value = _DEFAULTS.get(field_name, '')
+        if conversion == 'r':
+            value = repr(value)
+        elif conversion == 'a':
+            value = ascii(value)
+        chunks.append(format(value, format_spec))
+    return ''.join(chunks)
+
+
+_COMPILED_SCRIPTS = {
+    (category, script_key): _compile_template(template)
+    for category, scripts in AGENT_SCRIPTS.items()
+    for script_key, template in scripts.items()
+    if isinstance(template, str)
+}
+
+
 # Dynamische Script-Generierung
 def generate_personalized_script(
     script_type: str,
@@ -357,25 +481,10 @@ def generate_personalized_script(
     # Script-Template holen
     parts = script_type.split('.')
     if len(parts) == 2:
-        category, script_key = parts
-        if category in AGENT_SCRIPTS and script_key in AGENT_SCRIPTS[category]:
-            template = AGENT_SCRIPTS[category][script_key]
-            
-            # Template mit Kontext füllen
-            try:
-                return template.format(**context)
-            except KeyError as e:
-                # Fehlende Kontext-Werte mit Defaults ersetzen
-                defaults = {
-                    'name': 'Kunde',
-                    'agent_name': 'Ihr KI-Assistent',
-                    'company': 'VocalIQ',
-                    'hotel_name': 'Hotel Alpenblick',
-                    'topic': 'unser Angebot',
-                    'product': 'unsere Lösung'
-                }
-                context_with_defaults = {**defaults, **context}
-                return template.format(**context_with_defaults)
+        compiled = _COMPILED_SCRIPTS.get((parts[0], parts[1]))
+        if compiled is not None:
+            # Template mit Kontext füllen (fehlende Werte aus _DEFAULTS)
+            return _render_template(compiled, context)
     
     # Fallback
     return "Wie kann ich Ihnen helfen?"
\ No newline at end of file
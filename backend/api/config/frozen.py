@@ -0,0 +1,22 @@
+"""
+Hilfsfunktion zum Einfrieren der statischen Konfigurations-Strukturen
+"""
+import sys
+from types import MappingProxyType
+from typing import Any
+
+
+def freeze(value: Any, intern_strings: bool = False) -> Any:
+    """
+    Wandelt verschachtelte dicts/lists rekursiv in read-only Strukturen um
+
+    dict → MappingProxyType, list/tuple → tuple. Mit intern_strings=True
+    werden Strings zusätzlich per sys.intern dedupliziert.
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item, intern_strings) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item, intern_strings) for item in value)
+    if intern_strings and isinstance(value, str):
+        return sys.intern(value)
+    return value
@@ -1,6 +1,9 @@
 """
 Deutsche Stimmen-Konfiguration für ElevenLabs
 """
+from typing import Mapping, Optional
+
+from api.config.frozen import freeze
 
 GERMAN_VOICES = {
     "male": [
@@ -116,29 +119,29 @@ VOICE_SETTINGS = {
     "use_speaker_boost": True,  # Verbesserte Sprecherqualität
 }
 
-def get_german_voice_by_name(name: str) -> dict:
+# Statische Konfiguration read-only machen
+GERMAN_VOICES = freeze(GERMAN_VOICES)
+RECOMMENDED_VOICES = freeze(RECOMMENDED_VOICES)
+
+# Flache Lookup-Tabellen, einmal beim Import aufgebaut
+# Namen per casefold() normalisiert (korrekt auch für ß/ẞ und Umlaute)
+_BY_NAME = {voice["name"].casefold(): voice for gender_voices in GERMAN_VOICES.values() for voice in gender_voices}
+_BY_ID = {voice["voice_id"]: voice for gender_voices in GERMAN_VOICES.values() for voice in gender_voices}
+_ALL_VOICES = tuple(_BY_ID.values())
+
+def get_german_voice_by_name(name: str) -> Optional[Mapping]:
     """Hole deutsche Stimme nach Name"""
-    for gender_voices in GERMAN_VOICES.values():
-        for voice in gender_voices:
-            if voice["name"].lower() == name.lower():
-                return voice
-    return None
+    return _BY_NAME.get(name.casefold())
 
-def get_recommended_voice_for_usecase(use_case: str) -> dict:
+def get_recommended_voice_for_usecase(use_case: str) -> Optional[Mapping]:
     """Hole empfohlene Stimme für einen Use Case"""
-    voice_ids = RECOMMENDED_VOICES.get(use_case, [])
+    voice_ids = RECOMMENDED_VOICES.get(use_case, ())
     if voice_ids:
-        # Erste empfohlene Stimme zurückgeben
+        # Erste empfohlene Stimme zurückgeben (Eintrag ist Voice-ID oder Name)
         first_id = voice_ids[0]
-        for gender_voices in GERMAN_VOICES.values():
-            for voice in gender_voices:
-                if voice["voice_id"] == first_id or voice["name"] == first_id:
-                    return voice
+        return _BY_ID.get(first_id) or _BY_NAME.get(first_id.casefold())
     return None
 
 def get_all_german_voices() -> list:
     """Alle deutschen Stimmen als flache Liste"""
-    all_voices = []
-    for gender_voices in GERMAN_VOICES.values():
-        all_voices.extend(gender_voices)
-    return all_voices
\ No newline at end of file
+    return list(_ALL_VOICES)
@@ -2,9 +2,10 @@
 VocalIQ Configuration Management
 Zentrale Konfiguration mit Pydantic Settings
 """
+from dataclasses import dataclass
 from functools import lru_cache
-from typing import Optional, List
-from pydantic_settings import BaseSettings
+from typing import Optional, Tuple, Union
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field, validator
 
 
@@ -22,7 +23,7 @@ class Settings(BaseSettings):
     # API Configuration
     API_BASE_URL: str = Field(default="http://localhost:8000")
     FRONTEND_URL: str = Field(default="http://localhost:5173")
-    ALLOWED_ORIGINS: str = Field(default="http://localhost:5173,http://localhost:3000")
+    ALLOWED_ORIGINS: Union[Tuple[str, ...], str] = Field(default="http://localhost:5173,http://localhost:3000")
     API_VERSION: str = Field(default="v1")
     REQUEST_TIMEOUT: int = Field(default=30)
     MAX_REQUEST_SIZE: int = Field(default=50)
@@ -41,6 +42,7 @@ class Settings(BaseSettings):
     DATABASE_POOL_TIMEOUT: int = Field(default=30)
     DATABASE_POOL_RECYCLE: int = Field(default=3600)
     DATABASE_ECHO: bool = Field(default=False)
+    DATABASE_STATEMENT_CACHE_SIZE: int = Field(default=1024)
     
     # Redis
     REDIS_URL: str = Field(default="redis://localhost:6379/0")
@@ -55,6 +57,7 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = Field(default="HS256")
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(default=30)
     JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = Field(default=7)
+    JWT_SERVER_SESSION_TRACKING: bool = Field(default=True)  # Token-Sessions in Redis (Revocation/Logout)
     ADMIN_USERNAME: str = Field(default="admin")
     ADMIN_PASSWORD: str = Field(default="vocaliq2024")
     ADMIN_EMAIL: str = Field(default="admin@vocaliq.de")
@@ -102,6 +105,7 @@ class Settings(BaseSettings):
     SESSION_COOKIE_SAMESITE: str = Field(default="lax")
     ENCRYPTION_KEY: str = Field(default="AaI_ztaXR8wdefR80ML6zZGJkp3YkxBQqJEuymKhCoo=")
     PASSWORD_HASH_ROUNDS: int = Field(default=12)
+    PASSWORD_HASH_WORKERS: int = Field(default=2, ge=1)  # argon2 braucht 64 MiB pro Worker
     SESSION_TIMEOUT: int = Field(default=3600)
     MAX_LOGIN_ATTEMPTS: int = Field(default=5)
     LOCKOUT_DURATION: int = Field(default=900)
@@ -129,17 +133,22 @@ class Settings(BaseSettings):
     STORAGE_LOCAL_PATH: str = Field(default="./storage")
     UPLOAD_MAX_SIZE: str = Field(default="50MB")
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
-        extra = "ignore"
-    
-    @validator('ALLOWED_ORIGINS')
+    # frozen: Settings sind nach dem Laden unveränderlich
+    # defer_build: Core-Schema erst bei der ersten Instanz bauen
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=True,
+        extra="ignore",
+        frozen=True,
+        defer_build=True,
+    )
+    
+    @validator('ALLOWED_ORIGINS', pre=True, always=True)
     def parse_cors_origins(cls, v):
-        """Parse CORS origins from comma-separated string to list"""
+        """Parse CORS origins once from comma-separated string to tuple"""
         if isinstance(v, str):
-            return [origin.strip() for origin in v.split(',')]
-        return v
+            return tuple(origin.strip() for origin in v.split(',') if origin.strip())
+        return tuple(v)
     
     @validator('PASSWORD_HASH_ROUNDS')
     def validate_hash_rounds(cls, v):
@@ -158,10 +167,8 @@ class Settings(BaseSettings):
         return v
     
     @property
-    def allowed_origins_list(self) -> List[str]:
-        """Get CORS origins as list"""
-        if isinstance(self.ALLOWED_ORIGINS, str):
-            return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(',')]
+    def allowed_origins(self) -> Tuple[str, ...]:
+        """Get CORS origins as a tuple (parsed once at construction)"""
         return self.ALLOWED_ORIGINS
     
     @property
@@ -185,4 +192,37 @@ class Settings(BaseSettings):
 @lru_cache()
 def get_settings() -> Settings:
     """Get cached settings instance"""
-    return Settings()
\ No newline at end of file
+    return Settings()
+
+
+@dataclass(frozen=True, slots=True)
+class SecuritySnapshot:
+    """Unveränderlicher Auszug der Auth-Settings für den Token-Hot-Path"""
+    jwt_secret_key: str
+    jwt_algorithms: Tuple[str, ...]
+    access_token_expire_seconds: int
+    refresh_token_expire_seconds: int
+    session_timeout: int
+    session_tracking: bool
+    max_login_attempts: int
+    lockout_duration: int
+    
+    @property
+    def jwt_algorithm(self) -> str:
+        return self.jwt_algorithms[0]
+
+
+@lru_cache()
+def get_security_snapshot() -> SecuritySnapshot:
+    """Get cached security settings snapshot"""
+    settings = get_settings()
+    return SecuritySnapshot(
+        jwt_secret_key=settings.JWT_SECRET_KEY,
+        jwt_algorithms=(settings.JWT_ALGORITHM,),
+        access_token_expire_seconds=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        refresh_token_expire_seconds=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600,
+        session_timeout=settings.SESSION_TIMEOUT,
+        session_tracking=settings.JWT_SERVER_SESSION_TRACKING,
+        max_login_attempts=settings.MAX_LOGIN_ATTEMPTS,
+        lockout_duration=settings.LOCKOUT_DURATION,
+    )
@@ -2,6 +2,8 @@
 VocalIQ Database Configuration
 SQLModel + SQLAlchemy Database Setup mit PostgreSQL
 """
+import asyncio
+import itertools
 import logging
 from typing import AsyncGenerator, Optional
 from contextlib import asynccontextmanager
@@ -19,6 +21,16 @@ logger = logging.getLogger(__name__)
 engine = None
 async_session_maker = None
 
+# Maskierte Engine-URL (host:port/db), einmal beim Engine-Aufbau berechnet
+_masked_url = "unknown"
+
+# Sampling für Debug-SQL-Logging
+SQL_LOG_SAMPLE_RATE = 100
+_sql_sampler = itertools.count()
+
+# Wiederverwendetes Statement für Health Checks
+_HEALTH_CHECK_QUERY = text("SELECT 1 as test")
+
 
 def get_database_url() -> str:
     """Get database URL from settings"""
@@ -40,10 +52,11 @@ def get_database_url() -> str:
 
 def create_database_engine():
     """Create database engine"""
-    global engine, async_session_maker
+    global engine, async_session_maker, _masked_url
     
     database_url = get_database_url()
-    logger.info(f"🗄️ Connecting to database: {database_url.split('@')[1] if '@' in database_url else 'unknown'}")
+    _masked_url = database_url.rsplit('@', 1)[1] if '@' in database_url else "unknown"
+    logger.info(f"🗄️ Connecting to database: {_masked_url}")
     
     # Engine configuration
     engine_kwargs = {
@@ -55,6 +68,10 @@ def create_database_engine():
                 "application_name": f"VocalIQ-API-{settings.ENVIRONMENT}",
             },
             "command_timeout": 30,
+            # asyncpg-Statement-Cache und SQLAlchemy-Prepared-Statement-Cache
+            # (0 setzen hinter PgBouncer im Transaction-Mode)
+            "statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE,
         }
     }
     
@@ -78,27 +95,37 @@ def create_database_engine():
     )
     
     # Add event listeners
+    is_sqlite = engine.url.get_backend_name() == "sqlite"
+    
     @event.listens_for(engine.sync_engine, "connect")
     def set_sqlite_pragma(dbapi_connection, connection_record):
         """Set SQLite pragma for foreign key support (if using SQLite)"""
-        if "sqlite" in str(engine.url):
+        if is_sqlite:
             cursor = dbapi_connection.cursor()
             cursor.execute("PRAGMA foreign_keys=ON")
             cursor.close()
     
-    @event.listens_for(engine.sync_engine, "before_cursor_execute")
-    def receive_before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
-        """Log slow queries in debug mode"""
-        if settings.DEBUG:
-            context._query_start_time = logger.info(f"🔍 Executing SQL: {statement[:100]}...")
+    # SQL-Logging nur bei DEBUG + DATABASE_ECHO, und dann nur jedes N-te Statement
+    if settings.DEBUG and settings.DATABASE_ECHO:
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def receive_before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            """Log a sample of executed statements in debug mode"""
+            if next(_sql_sampler) % SQL_LOG_SAMPLE_RATE == 0:
+                logger.debug("🔍 Executing SQL: %.100s...", statement)
     
     return engine
 
 
+def get_engine():
+    """Get database engine, created lazily on first use"""
+    if engine is None:
+        create_database_engine()
+    return engine
+
+
 async def create_tables():
     """Create all database tables"""
-    if not engine:
-        create_database_engine()
+    engine = get_engine()
     
     try:
         logger.info("📋 Creating database tables...")
@@ -126,8 +153,7 @@ async def create_tables():
 
 async def drop_tables():
     """Drop all database tables (for testing/development)"""
-    if not engine:
-        create_database_engine()
+    engine = get_engine()
     
     try:
         logger.warning("🗑️ Dropping all database tables...")
@@ -197,13 +223,13 @@ async def health_check() -> dict:
     try:
         async with engine.begin() as conn:
             # Simple query to test connection
-            result = await conn.execute(text("SELECT 1 as test"))
+            result = await conn.execute(_HEALTH_CHECK_QUERY)
             test_value = result.scalar()
             
             if test_value == 1:
                 return {
                     "status": "healthy",
-                    "database_url": str(engine.url).split('@')[1] if '@' in str(engine.url) else "unknown",
+                    "database_url": _masked_url,
                     "pool_size": getattr(engine.pool, 'size', 'unknown'),
                     "checked_out_connections": getattr(engine.pool, 'checkedout', 'unknown'),
                 }
@@ -242,21 +268,27 @@ async def execute_sql(query: str, params: Optional[dict] = None) -> any:
         return result
 
 
+_COUNTED_TABLES = (
+    "organizations", "users", "phone_numbers", "call_logs",
+    "conversations", "call_analytics", "api_keys", "system_config"
+)
+
+# Alle Counts in einem Roundtrip
+_TABLE_COUNTS_QUERY = text(" UNION ALL ".join(
+    f"SELECT '{table}' AS table_name, COUNT(*) AS row_count FROM {table}"
+    for table in _COUNTED_TABLES
+))
+
+
 async def get_table_counts() -> dict:
     """Get row counts for all tables"""
     counts = {}
     
     try:
         async with get_session_context() as session:
-            tables = [
-                "organizations", "users", "phone_numbers", "call_logs",
-                "conversations", "call_analytics", "api_keys", "system_config"
-            ]
-            
-            for table in tables:
-                result = await session.execute(text(f"SELECT COUNT(*) FROM {table}"))
-                counts[table] = result.scalar()
-                
+            result = await session.execute(_TABLE_COUNTS_QUERY)
+            counts.update(result.tuples().all())
+    
     except Exception as e:
         logger.error(f"Error getting table counts: {str(e)}")
         counts["error"] = str(e)
@@ -268,7 +300,7 @@ async def get_table_counts() -> dict:
 async def check_table_exists(table_name: str) -> bool:
     """Check if a table exists"""
     try:
-        async with engine.begin() as conn:
+        async with get_engine().begin() as conn:
             result = await conn.execute(
                 text("""
                 SELECT EXISTS (
@@ -287,37 +319,37 @@ async def check_table_exists(table_name: str) -> bool:
 async def create_indexes():
     """Create additional database indexes for performance"""
     indexes = [
-        "CREATE INDEX IF NOT EXISTS idx_call_logs_created_at ON call_logs(created_at DESC)",
-        "CREATE INDEX IF NOT EXISTS idx_call_logs_status ON call_logs(status)",
-        "CREATE INDEX IF NOT EXISTS idx_call_logs_direction ON call_logs(direction)",
-        "CREATE INDEX IF NOT EXISTS idx_call_logs_from_number ON call_logs(from_number)",
-        "CREATE INDEX IF NOT EXISTS idx_conversations_session_id ON conversations(session_id)",
-        "CREATE INDEX IF NOT EXISTS idx_conversations_created_at ON conversations(created_at DESC)",
-        "CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)",
-        "CREATE INDEX IF NOT EXISTS idx_users_status ON users(status)",
-        "CREATE INDEX IF NOT EXISTS idx_organizations_slug ON organizations(slug)",
-        "CREATE INDEX IF NOT EXISTS idx_phone_numbers_number ON phone_numbers(number)",
-        "CREATE INDEX IF NOT EXISTS idx_call_analytics_date ON call_analytics(date DESC)",
-        "CREATE INDEX IF NOT EXISTS idx_call_analytics_org_date ON call_analytics(organization_id, date)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_call_logs_created_at ON call_logs(created_at DESC)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_call_logs_status ON call_logs(status)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_call_logs_direction ON call_logs(direction)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_call_logs_from_number ON call_logs(from_number)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_conversations_session_id ON conversations(session_id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_conversations_created_at ON conversations(created_at DESC)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_email ON users(email)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_status ON users(status)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_organizations_slug ON organizations(slug)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_phone_numbers_number ON phone_numbers(number)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_call_analytics_date ON call_analytics(date DESC)",
     ]
     
+    engine = get_engine()
+    
+    async def create_index(index_sql: str):
+        # CONCURRENTLY darf nicht in einer Transaktion laufen → eigene Autocommit-Verbindung
+        try:
+            async with engine.connect() as conn:
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                await conn.execute(text(index_sql))
+            logger.debug(f"✅ Created index: {index_sql.split(' ON ')[1].split('(')[0]}")
+        except Exception as e:
+            logger.warning(f"Index creation warning: {str(e)}")
+    
     try:
         logger.info("📊 Creating database indexes...")
-        async with engine.begin() as conn:
-            for index_sql in indexes:
-                try:
-                    await conn.execute(text(index_sql))
-                    logger.debug(f"✅ Created index: {index_sql.split(' ON ')[1].split('(')[0]}")
-                except Exception as e:
-                    logger.warning(f"Index creation warning: {str(e)}")
+        await asyncio.gather(*(create_index(index_sql) for index_sql in indexes))
         
         logger.info("✅ Database indexes created successfully")
         
     except Exception as e:
         logger.error(f"❌ Failed to create indexes: {str(e)}")
         raise
-
-
-# Initialize database on import in production
-if settings.ENVIRONMENT != "test":
-    create_database_engine()
\ No newline at end of file
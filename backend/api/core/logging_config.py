@@ -0,0 +1,49 @@
+"""
+VocalIQ Logging-Konfiguration
+Nicht-blockierendes Logging: Records landen in einer Queue, ein Hintergrund-Thread
+formatiert und schreibt sie (kein I/O im Event-Loop)
+"""
+import atexit
+import copy
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: Optional[QueueListener] = None
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler, der nur die Formatter-Arbeit dem Listener-Thread überlässt"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # msg % args im aufrufenden Thread auflösen: veränderliche Argumente werden
+        # mit ihrem Stand zum Log-Zeitpunkt geloggt und Formatfehler landen beim Aufrufer.
+        # Zeitstempel-/Traceback-Formatierung (Formatter) läuft im Listener-Thread.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def setup_logging(level: str = "INFO") -> None:
+    """Root-Logger auf Queue + Hintergrund-Listener umstellen (wie basicConfig nur einmal)"""
+    global _listener
+    root = logging.getLogger()
+    if _listener is not None or root.handlers:
+        return
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    root.setLevel(getattr(logging, level))
+    root.addHandler(_DeferredQueueHandler(log_queue))
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    # Beim Beenden restliche Records schreiben
+    atexit.register(_listener.stop)
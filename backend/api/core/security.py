@@ -2,56 +2,124 @@
 VocalIQ Security Module
 Implementiert JWT-Authentifizierung, Password-Hashing und API-Key-Verschlüsselung
 """
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Any, Dict
+from functools import lru_cache
+from typing import Optional, Any, Dict, FrozenSet, Tuple, Union
+import re
 import secrets
-from jose import JWTError, jwt
+import time
+import uuid
+import jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken
 import hashlib
 import hmac
-import os
-from redis import Redis
+from redis.asyncio import Redis
+from cachetools import TTLCache
 
-from api.core.config import get_settings
+from api.core.config import get_settings, get_security_snapshot
 
 settings = get_settings()
+_SEC = get_security_snapshot()
 
-# Password-Hashing
-pwd_context = CryptContext(
-    schemes=["bcrypt"],
-    deprecated="auto",
-    bcrypt__rounds=settings.PASSWORD_HASH_ROUNDS
-)
+# JWT-Key einmal als Bytes vorbereiten (nicht bei jedem encode/decode neu kodieren)
+_JWT_KEY = _SEC.jwt_secret_key.encode()
+
+# Password-Hashing (ein Context pro Runden-Konfiguration, einmal aufgebaut)
+# Neue Hashes mit argon2id, bestehende bcrypt-Hashes werden weiterhin verifiziert
+@lru_cache(maxsize=4)
+def _pwd_context(rounds: int) -> CryptContext:
+    return CryptContext(
+        schemes=["argon2", "bcrypt"],
+        deprecated="auto",
+        argon2__type="ID",
+        argon2__time_cost=2,
+        argon2__memory_cost=65536,
+        argon2__parallelism=1,
+        bcrypt__rounds=rounds
+    )
+
+
+def _hash_password(password: str, rounds: int) -> str:
+    return _pwd_context(rounds).hash(password)
+
+
+def _verify_password(plain_password: str, hashed_password: str, rounds: int) -> bool:
+    return _pwd_context(rounds).verify(plain_password, hashed_password)
+
+
+# Prozess-Pool für Password-Hashing (lazy, erst beim ersten Login gestartet).
+# "spawn" statt fork: der laufende Server hat bereits Threads (Logging-Queue,
+# Executor), deren Locks ein geforkter Worker geerbt hätte.
+_pwd_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pwd_pool() -> ProcessPoolExecutor:
+    global _pwd_pool
+    if _pwd_pool is None:
+        _pwd_pool = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pwd_pool
+
+
+def shutdown_password_pool() -> None:
+    """Hashing-Worker beim Shutdown beenden"""
+    global _pwd_pool
+    if _pwd_pool is not None:
+        _pwd_pool.shutdown(wait=True, cancel_futures=True)
+        _pwd_pool = None
+
+
+# API-Key-Verschlüsselung (optional, ein Cipher pro Key)
+@lru_cache(maxsize=4)
+def _cipher_suite(encryption_key: Optional[str]) -> Optional[Fernet]:
+    try:
+        # Versuche Fernet-Key zu verwenden wenn vorhanden
+        if encryption_key and encryption_key != "None":
+            # Wenn der Key kein gültiges Base64 ist, generiere einen neuen
+            try:
+                return Fernet(encryption_key.encode())
+            except:
+                # Fallback: Generiere einen gültigen Key
+                default_key = Fernet.generate_key()
+                print(f"⚠️ Invalid ENCRYPTION_KEY, using generated key. Set this in production: {default_key.decode()}")
+                return Fernet(default_key)
+        else:
+            # Kein Key vorhanden - generiere einen
+            default_key = Fernet.generate_key()
+            print(f"⚠️ No ENCRYPTION_KEY set. Generated key: {default_key.decode()}")
+            return Fernet(default_key)
+    except Exception as e:
+        print(f"⚠️ Encryption setup failed: {e}. Running without encryption.")
+        return None
 
-# API-Key-Verschlüsselung (optional)
-try:
-    # Versuche Fernet-Key zu verwenden wenn vorhanden
-    if settings.ENCRYPTION_KEY and settings.ENCRYPTION_KEY != "None":
-        # Wenn der Key kein gültiges Base64 ist, generiere einen neuen
-        try:
-            cipher_suite = Fernet(settings.ENCRYPTION_KEY.encode())
-        except:
-            # Fallback: Generiere einen gültigen Key
-            from cryptography.fernet import Fernet as FernetGen
-            default_key = FernetGen.generate_key()
-            cipher_suite = Fernet(default_key)
-            print(f"⚠️ Invalid ENCRYPTION_KEY, using generated key. Set this in production: {default_key.decode()}")
-    else:
-        # Kein Key vorhanden - generiere einen
-        from cryptography.fernet import Fernet as FernetGen
-        default_key = FernetGen.generate_key()
-        cipher_suite = Fernet(default_key)
-        print(f"⚠️ No ENCRYPTION_KEY set. Generated key: {default_key.decode()}")
-except Exception as e:
-    print(f"⚠️ Encryption setup failed: {e}. Running without encryption.")
-    cipher_suite = None
+
+cipher_suite = _cipher_suite(settings.ENCRYPTION_KEY)
 
 # Redis für Session-Management
-redis_client = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+redis_client = Redis.from_url(
+    settings.REDIS_URL,
+    decode_responses=True,
+    max_connections=settings.REDIS_MAX_CONNECTIONS
+)
+
+# Lokaler Cache für gültige Token-Sessions (jti), spart den Redis-Roundtrip pro Request.
+# Ein in einem anderen Worker revozierter Token bleibt hier höchstens ttl Sekunden gültig.
+_jti_cache: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+
+# Bereits dekodierte Tokens (Token-String → (exp, TokenPayload)), spart HMAC + JSON-Parsing
+_token_cache: TTLCache = TTLCache(maxsize=4096, ttl=60)
+
+# API-Key-Format: <prefix>_<token_urlsafe>, einmal kompiliert
+_API_KEY_RE = re.compile(r"[a-z]{2,8}_[A-Za-z0-9_-]{32,}")
 
 # HTTP Bearer Token
 security = HTTPBearer(auto_error=False)
@@ -66,7 +134,7 @@ class TokenPayload(BaseModel):
     type: str = "access"
     user_id: Optional[int] = None
     organization_id: Optional[int] = None
-    scopes: list[str] = []
+    scopes: FrozenSet[str] = frozenset()
 
 
 class LoginAttempt(BaseModel):
@@ -81,123 +149,188 @@ class SecurityManager:
     """Zentrale Security-Klasse für alle Authentifizierungs-Operationen"""
     
     @staticmethod
-    def create_access_token(
-        data: Dict[str, Any], 
+    def _encode_access_token(
+        data: Dict[str, Any],
         expires_delta: Optional[timedelta] = None
-    ) -> str:
-        """Erstellt einen JWT Access Token"""
+    ) -> Tuple[str, str]:
+        """Signiert einen Access Token und gibt (Token, jti) zurück"""
         to_encode = data.copy()
         
+        # Ein Zeitstempel, Claims direkt als Epoch-Sekunden
+        now = int(time.time())
         if expires_delta:
-            expire = datetime.utcnow() + expires_delta
+            expire = now + int(expires_delta.total_seconds())
         else:
-            expire = datetime.utcnow() + timedelta(
-                minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES
-            )
+            expire = now + _SEC.access_token_expire_seconds
         
         # Unique Token ID für Session-Tracking
-        jti = secrets.token_urlsafe(32)
+        jti = uuid.uuid4().hex
         
         to_encode.update({
             "exp": expire,
-            "iat": datetime.utcnow(),
+            "iat": now,
             "jti": jti,
             "type": "access"
         })
         
         token = jwt.encode(
             to_encode, 
-            settings.JWT_SECRET_KEY, 
-            algorithm=settings.JWT_ALGORITHM
+            _JWT_KEY, 
+            algorithm=_SEC.jwt_algorithm
         )
-        
-        # Token in Redis für Session-Management speichern
-        redis_client.setex(
-            f"token:{jti}",
-            settings.SESSION_TIMEOUT,
-            f"user:{data.get('user_id')}"
-        )
-        
-        return token
+        return token, jti
     
     @staticmethod
-    def create_refresh_token(user_id: int) -> str:
-        """Erstellt einen JWT Refresh Token"""
-        expire = datetime.utcnow() + timedelta(days=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS)
-        jti = secrets.token_urlsafe(32)
+    def _encode_refresh_token(user_id: int) -> Tuple[str, str]:
+        """Signiert einen Refresh Token und gibt (Token, jti) zurück"""
+        now = int(time.time())
+        expire = now + _SEC.refresh_token_expire_seconds
+        jti = uuid.uuid4().hex
         
         to_encode = {
             "sub": str(user_id),
             "user_id": user_id,
             "exp": expire,
-            "iat": datetime.utcnow(),
+            "iat": now,
             "jti": jti,
             "type": "refresh"
         }
         
         token = jwt.encode(
             to_encode,
-            settings.JWT_SECRET_KEY,
-            algorithm=settings.JWT_ALGORITHM
+            _JWT_KEY,
+            algorithm=_SEC.jwt_algorithm
         )
+        return token, jti
+    
+    @staticmethod
+    async def create_access_token(
+        data: Dict[str, Any], 
+        expires_delta: Optional[timedelta] = None
+    ) -> str:
+        """Erstellt einen JWT Access Token"""
+        token, jti = SecurityManager._encode_access_token(data, expires_delta)
+        
+        # Token in Redis für Session-Management speichern
+        if _SEC.session_tracking:
+            await redis_client.set(
+                f"token:{jti}",
+                f"user:{data.get('user_id')}",
+                ex=_SEC.session_timeout,
+                nx=True
+            )
+        
+        return token
+    
+    @staticmethod
+    async def create_refresh_token(user_id: int) -> str:
+        """Erstellt einen JWT Refresh Token"""
+        token, jti = SecurityManager._encode_refresh_token(user_id)
         
         # Refresh Token mit längerer Gültigkeit speichern
-        redis_client.setex(
-            f"refresh_token:{jti}",
-            settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600,
-            f"user:{user_id}"
-        )
+        if _SEC.session_tracking:
+            await redis_client.set(
+                f"refresh_token:{jti}",
+                f"user:{user_id}",
+                ex=_SEC.refresh_token_expire_seconds,
+                nx=True
+            )
         
         return token
     
     @staticmethod
-    def verify_token(token: str) -> TokenPayload:
+    async def create_token_pair(
+        data: Dict[str, Any],
+        user_id: int,
+        expires_delta: Optional[timedelta] = None
+    ) -> Tuple[str, str]:
+        """Erstellt Access und Refresh Token, Sessions in einem Redis-Roundtrip"""
+        access_token, access_jti = SecurityManager._encode_access_token(data, expires_delta)
+        refresh_token, refresh_jti = SecurityManager._encode_refresh_token(user_id)
+        
+        if _SEC.session_tracking:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.set(
+                    f"token:{access_jti}",
+                    f"user:{data.get('user_id')}",
+                    ex=_SEC.session_timeout,
+                    nx=True
+                )
+                pipe.set(
+                    f"refresh_token:{refresh_jti}",
+                    f"user:{user_id}",
+                    ex=_SEC.refresh_token_expire_seconds,
+                    nx=True
+                )
+                await pipe.execute()
+        
+        return access_token, refresh_token
+    
+    @staticmethod
+    async def verify_token(token: str) -> TokenPayload:
         """Verifiziert und dekodiert einen JWT Token"""
-        try:
-            payload = jwt.decode(
-                token,
-                settings.JWT_SECRET_KEY,
-                algorithms=[settings.JWT_ALGORITHM]
+        cached = _token_cache.get(token)
+        if cached is not None and (cached[0] is None or cached[0] > time.time()):
+            token_payload = cached[1]
+        else:
+            try:
+                payload = jwt.decode(
+                    token,
+                    _JWT_KEY,
+                    algorithms=_SEC.jwt_algorithms
+                )
+            except jwt.PyJWTError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail=f"Invalid token: {str(e)}"
+                )
+            # Signatur ist geprüft - Claims ohne erneute Pydantic-Validierung übernehmen
+            token_payload = TokenPayload.model_construct(
+                **{**payload, "scopes": frozenset(payload.get("scopes") or ())}
             )
-            
-            # Prüfe ob Token in Redis-Session existiert
-            jti = payload.get("jti")
-            if jti and not redis_client.exists(f"token:{jti}"):
+            _token_cache[token] = (token_payload.exp, token_payload)
+        
+        # Prüfe ob Token in Redis-Session existiert
+        jti = token_payload.jti
+        if _SEC.session_tracking and jti and jti not in _jti_cache:
+            if not await redis_client.exists(f"token:{jti}"):
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Token session expired or revoked"
                 )
-            
-            return TokenPayload(**payload)
-            
-        except JWTError as e:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail=f"Invalid token: {str(e)}"
-            )
+            _jti_cache[jti] = True
+        
+        return token_payload
     
     @staticmethod
-    def revoke_token(jti: str) -> bool:
+    async def revoke_token(jti: str) -> bool:
         """Revoked einen Token (Logout)"""
-        return redis_client.delete(f"token:{jti}") > 0
+        _jti_cache.pop(jti, None)
+        return await redis_client.delete(f"token:{jti}") > 0
     
     @staticmethod
-    def hash_password(password: str) -> str:
-        """Hasht ein Passwort mit bcrypt"""
-        return pwd_context.hash(password)
+    async def hash_password(password: str) -> str:
+        """Hasht ein Passwort mit argon2id (im Prozess-Pool, blockiert den Event-Loop nicht)"""
+        return await asyncio.get_running_loop().run_in_executor(
+            _get_pwd_pool(), _hash_password, password, settings.PASSWORD_HASH_ROUNDS
+        )
     
     @staticmethod
-    def verify_password(plain_password: str, hashed_password: str) -> bool:
-        """Verifiziert ein Passwort gegen Hash"""
-        return pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(plain_password: str, hashed_password: str) -> bool:
+        """Verifiziert ein Passwort gegen Hash (im Prozess-Pool)"""
+        return await asyncio.get_running_loop().run_in_executor(
+            _get_pwd_pool(), _verify_password, plain_password, hashed_password,
+            settings.PASSWORD_HASH_ROUNDS
+        )
     
     @staticmethod
-    def encrypt_api_key(api_key: str) -> str:
+    def encrypt_api_key(api_key: Union[str, bytes]) -> str:
         """Verschlüsselt einen API-Key für sichere Speicherung"""
         if not settings.API_KEY_ENCRYPTION:
-            return api_key
+            return api_key.decode() if isinstance(api_key, bytes) else api_key
         
-        return cipher_suite.encrypt(api_key.encode()).decode()
+        data = api_key if isinstance(api_key, bytes) else api_key.encode()
+        return _cipher_suite(settings.ENCRYPTION_KEY).encrypt(data).decode()
     
     @staticmethod
     def decrypt_api_key(encrypted_key: str) -> str:
@@ -205,38 +338,43 @@ class SecurityManager:
         if not settings.API_KEY_ENCRYPTION:
             return encrypted_key
         
+        cipher = _cipher_suite(settings.ENCRYPTION_KEY)
         try:
-            return cipher_suite.decrypt(encrypted_key.encode()).decode()
-        except Exception:
+            if cipher is None:
+                raise InvalidToken
+            # Fernet akzeptiert den Token direkt als str
+            return cipher.decrypt(encrypted_key).decode()
+        except InvalidToken:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to decrypt API key"
             )
     
     @staticmethod
-    def check_login_attempts(ip_address: str, username: str) -> bool:
+    async def check_login_attempts(ip_address: str, username: str) -> bool:
         """Prüft Rate-Limiting für Login-Versuche"""
         key = f"login_attempts:{ip_address}:{username}"
-        attempts = redis_client.get(key)
+        attempts = await redis_client.get(key)
         
-        if attempts and int(attempts) >= settings.MAX_LOGIN_ATTEMPTS:
+        if attempts and int(attempts) >= _SEC.max_login_attempts:
             return False
         
         return True
     
     @staticmethod
-    def record_login_attempt(ip_address: str, username: str, success: bool):
+    async def record_login_attempt(ip_address: str, username: str, success: bool):
         """Zeichnet einen Login-Versuch auf"""
         key = f"login_attempts:{ip_address}:{username}"
         
         if success:
             # Erfolgreiche Anmeldung - Counter zurücksetzen
-            redis_client.delete(key)
+            await redis_client.delete(key)
         else:
-            # Fehlgeschlagene Anmeldung - Counter erhöhen
-            current = redis_client.incr(key)
-            if current == 1:  # Erste fehlgeschlagene Anmeldung
-                redis_client.expire(key, settings.LOCKOUT_DURATION)
+            # Fehlgeschlagene Anmeldung - Counter erhöhen und Sperrfrist setzen (ein Roundtrip)
+            async with redis_client.pipeline(transaction=True) as pipe:
+                pipe.incr(key)
+                pipe.expire(key, _SEC.lockout_duration)
+                await pipe.execute()
     
     @staticmethod
     def generate_api_key(prefix: str = "viq") -> str:
@@ -247,15 +385,14 @@ class SecurityManager:
     @staticmethod
     def validate_api_key_format(api_key: str) -> bool:
         """Validiert das Format eines API-Keys"""
-        parts = api_key.split("_")
-        return len(parts) == 2 and len(parts[1]) >= 32
+        return _API_KEY_RE.fullmatch(api_key) is not None
 
 
 def get_client_ip(request: Request) -> str:
     """Extrahiert die Client-IP-Adresse"""
     forwarded_for = request.headers.get("X-Forwarded-For")
     if forwarded_for:
-        return forwarded_for.split(",")[0].strip()
+        return forwarded_for.partition(",")[0].strip()
     
     real_ip = request.headers.get("X-Real-IP")
     if real_ip:
@@ -279,7 +416,7 @@ async def get_current_user_token(
     # IP-basierte Rate-Limiting (optional)
     client_ip = get_client_ip(request)
     
-    token_payload = SecurityManager.verify_token(credentials.credentials)
+    token_payload = await SecurityManager.verify_token(credentials.credentials)
     
     if not token_payload.user_id:
         raise HTTPException(
@@ -292,8 +429,10 @@ async def get_current_user_token(
 
 def require_scopes(required_scopes: list[str]):
     """Decorator für Scope-basierte Autorisierung"""
+    required = frozenset(required_scopes)
+    
     def scope_dependency(token: TokenPayload = Depends(get_current_user_token)):
-        if not all(scope in token.scopes for scope in required_scopes):
+        if not required.issubset(token.scopes):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Insufficient permissions. Required scopes: {required_scopes}"
@@ -2,9 +2,13 @@
 Subscription and Feature Management
 Preismodelle und Feature-Gates für VocalIQ
 """
+from dataclasses import dataclass
 from enum import Enum
-from typing import List, Dict, Optional
-from pydantic import BaseModel
+from functools import lru_cache
+from operator import attrgetter
+from typing import List, Dict, FrozenSet, Mapping, Optional, Tuple, Union
+
+from api.config.frozen import freeze
 
 class SubscriptionPlan(str, Enum):
     """Verfügbare Subscription Plans"""
@@ -15,6 +19,10 @@ class SubscriptionPlan(str, Enum):
     CUSTOM = "custom"       # Individuelle Vereinbarung
 
 
+# Rohwert → Enum-Instanz (einfacher dict-Lookup statt SubscriptionPlan(value))
+_PLANS_BY_VALUE: Dict[str, SubscriptionPlan] = {plan.value: plan for plan in SubscriptionPlan}
+
+
 class Feature(str, Enum):
     """Alle verfügbaren Features"""
     # Basis Features (alle Plans)
@@ -42,7 +50,8 @@ class Feature(str, Enum):
     PRIORITY_SUPPORT = "priority_support"
 
 
-class PlanLimits(BaseModel):
+@dataclass(frozen=True, slots=True)
+class PlanLimits:
     """Limits für jeden Plan"""
     max_leads: Optional[int] = None
     max_calls_per_month: Optional[int] = None
@@ -53,58 +62,66 @@ class PlanLimits(BaseModel):
     max_follow_ups_per_month: Optional[int] = None
 
 
-# Feature-Zuordnung zu Plans
-FEATURE_MATRIX: Dict[SubscriptionPlan, List[Feature]] = {
-    SubscriptionPlan.FREE: [
-        Feature.VOICE_AGENT,
-        Feature.BASIC_ROUTING,
-        Feature.CALL_HISTORY,
-    ],
-    
-    SubscriptionPlan.BASIC: [
-        Feature.VOICE_AGENT,
-        Feature.BASIC_ROUTING,
-        Feature.CALL_HISTORY,
-        Feature.KNOWLEDGE_BASE_BASIC,
-    ],
-    
-    SubscriptionPlan.PROFESSIONAL: [
-        Feature.VOICE_AGENT,
-        Feature.BASIC_ROUTING,
-        Feature.CALL_HISTORY,
-        Feature.KNOWLEDGE_BASE_BASIC,
-        Feature.LEAD_SCORING,
-        Feature.LEAD_DASHBOARD,
-        Feature.MANUAL_FOLLOW_UP,
-        Feature.KNOWLEDGE_BASE_PRO,
-        Feature.BASIC_ANALYTICS,
-    ],
-    
-    SubscriptionPlan.ENTERPRISE: [
-        # Alle Features
-        Feature.VOICE_AGENT,
-        Feature.BASIC_ROUTING,
-        Feature.CALL_HISTORY,
-        Feature.KNOWLEDGE_BASE_BASIC,
-        Feature.LEAD_SCORING,
-        Feature.LEAD_DASHBOARD,
-        Feature.MANUAL_FOLLOW_UP,
-        Feature.KNOWLEDGE_BASE_PRO,
-        Feature.BASIC_ANALYTICS,
-        Feature.AUTO_FOLLOW_UP,
-        Feature.LEAD_REACTIVATION,
-        Feature.LEAD_ENRICHMENT,
-        Feature.ROI_ANALYTICS,
-        Feature.BULK_OPERATIONS,
-        Feature.API_ACCESS,
-        Feature.CUSTOM_SCRIPTS,
-        Feature.WHITE_LABEL,
-        Feature.PRIORITY_SUPPORT,
-    ],
-    
-    SubscriptionPlan.CUSTOM: [
-        # Individuell konfigurierbar
-    ]
+class LimitKind(str, Enum):
+    """Prüfbare Plan-Limits (Werte entsprechen den PlanLimits-Feldern)"""
+    MAX_LEADS = "max_leads"
+    MAX_CALLS_PER_MONTH = "max_calls_per_month"
+    MAX_KNOWLEDGE_DOCS = "max_knowledge_docs"
+    MAX_USERS = "max_users"
+    MAX_PHONE_NUMBERS = "max_phone_numbers"
+    INCLUDED_MINUTES = "included_minutes"
+    MAX_FOLLOW_UPS_PER_MONTH = "max_follow_ups_per_month"
+
+
+# Limit-Art → Getter auf PlanLimits (auch per Rohwert-String nutzbar)
+_LIMIT_GETTERS = {kind: attrgetter(kind.value) for kind in LimitKind}
+
+
+# Feature-Zuordnung zu Plans (jede Stufe erweitert die vorherige)
+_FREE_FEATURES = frozenset({
+    Feature.VOICE_AGENT,
+    Feature.BASIC_ROUTING,
+    Feature.CALL_HISTORY,
+})
+
+_BASIC_FEATURES = _FREE_FEATURES | {
+    Feature.KNOWLEDGE_BASE_BASIC,
+}
+
+_PROFESSIONAL_FEATURES = _BASIC_FEATURES | {
+    Feature.LEAD_SCORING,
+    Feature.LEAD_DASHBOARD,
+    Feature.MANUAL_FOLLOW_UP,
+    Feature.KNOWLEDGE_BASE_PRO,
+    Feature.BASIC_ANALYTICS,
+}
+
+# Alle Features
+_ENTERPRISE_FEATURES = _PROFESSIONAL_FEATURES | {
+    Feature.AUTO_FOLLOW_UP,
+    Feature.LEAD_REACTIVATION,
+    Feature.LEAD_ENRICHMENT,
+    Feature.ROI_ANALYTICS,
+    Feature.BULK_OPERATIONS,
+    Feature.API_ACCESS,
+    Feature.CUSTOM_SCRIPTS,
+    Feature.WHITE_LABEL,
+    Feature.PRIORITY_SUPPORT,
+}
+
+FEATURE_MATRIX: Dict[SubscriptionPlan, FrozenSet[Feature]] = {
+    SubscriptionPlan.FREE: _FREE_FEATURES,
+    SubscriptionPlan.BASIC: _BASIC_FEATURES,
+    SubscriptionPlan.PROFESSIONAL: _PROFESSIONAL_FEATURES,
+    SubscriptionPlan.ENTERPRISE: _ENTERPRISE_FEATURES,
+    # Individuell konfigurierbar
+    SubscriptionPlan.CUSTOM: frozenset(),
+}
+
+# Geordnete Feature-Listen je Plan (Reihenfolge wie im Feature-Enum)
+FEATURE_LISTS: Dict[SubscriptionPlan, List[Feature]] = {
+    plan: [feature for feature in Feature if feature in features]
+    for plan, features in FEATURE_MATRIX.items()
 }
 
 # Plan Limits
@@ -163,6 +180,10 @@ PLAN_PRICES: Dict[SubscriptionPlan, float] = {
     SubscriptionPlan.CUSTOM: 0.0  # Individuell
 }
 
+# Preisdifferenzen für Upgrade-Pfade
+_UPGRADE_DELTA_BASIC_TO_PRO = PLAN_PRICES[SubscriptionPlan.PROFESSIONAL] - PLAN_PRICES[SubscriptionPlan.BASIC]
+_UPGRADE_DELTA_PRO_TO_ENT = PLAN_PRICES[SubscriptionPlan.ENTERPRISE] - PLAN_PRICES[SubscriptionPlan.PROFESSIONAL]
+
 # Add-On Preise
 ADDON_PRICES = {
     'extra_100_leads': 10.0,
@@ -181,10 +202,32 @@ USAGE_PRICES = {
     'api_call': 0.001,       # Pro API Call nach Kontingent
 }
 
+# Häufig genutzte Usage-Preise als Konstanten (in Cent, exakt ganzzahlig)
+_PRICE_MINUTE_OVERAGE_CENTS = round(USAGE_PRICES['minute_overage'] * 100)
+_PRICE_SMS_FOLLOW_UP_CENTS = round(USAGE_PRICES['sms_follow_up'] * 100)
+_PRICE_LEAD_ENRICHMENT_CENTS = round(USAGE_PRICES['lead_enrichment'] * 100)
+
 
 class SubscriptionService:
     """Service für Subscription und Feature Management"""
     
+    @staticmethod
+    def parse_plan(value: Union[str, SubscriptionPlan, None]) -> Optional[SubscriptionPlan]:
+        """
+        Wandelt einen Plan-Rohwert (z.B. aus der Datenbank) in das Enum um
+        
+        Args:
+            value: Plan als String oder Enum
+            
+        Returns:
+            SubscriptionPlan oder None bei unbekanntem Wert
+        """
+        if isinstance(value, SubscriptionPlan):
+            return value
+        if not value:
+            return None
+        return _PLANS_BY_VALUE.get(value.lower())
+    
     @staticmethod
     def has_feature(plan: SubscriptionPlan, feature: Feature) -> bool:
         """
@@ -201,7 +244,10 @@ class SubscriptionService:
             # Custom Plans müssen individuell geprüft werden
             return True  # Oder aus Datenbank laden
         
-        return feature in FEATURE_MATRIX.get(plan, [])
+        try:
+            return feature in FEATURE_MATRIX[plan]
+        except KeyError:
+            return False
     
     @staticmethod
     def get_plan_features(plan: SubscriptionPlan) -> List[Feature]:
@@ -214,7 +260,7 @@ class SubscriptionService:
         Returns:
             Liste der verfügbaren Features
         """
-        return FEATURE_MATRIX.get(plan, [])
+        return FEATURE_LISTS.get(plan, [])
     
     @staticmethod
     def get_plan_limits(plan: SubscriptionPlan) -> PlanLimits:
@@ -232,7 +278,7 @@ class SubscriptionService:
     @staticmethod
     def check_limit(
         plan: SubscriptionPlan,
-        limit_type: str,
+        limit_type: Union[LimitKind, str],
         current_value: int
     ) -> bool:
         """
@@ -240,24 +286,30 @@ class SubscriptionService:
         
         Args:
             plan: Der Subscription Plan
-            limit_type: Art des Limits (z.B. 'max_leads')
+            limit_type: Art des Limits (z.B. LimitKind.MAX_LEADS oder 'max_leads')
             current_value: Aktueller Wert
             
         Returns:
             True wenn noch im Limit, False wenn überschritten
         """
-        limits = PLAN_LIMITS.get(plan)
-        if not limits:
+        try:
+            limits = PLAN_LIMITS[plan]
+        except KeyError:
             return True
         
-        limit_value = getattr(limits, limit_type, None)
+        getter = _LIMIT_GETTERS.get(limit_type)
+        if getter is None:  # Unbekanntes Limit
+            return True
+        
+        limit_value = getter(limits)
         if limit_value is None:  # Unlimited
             return True
         
         return current_value < limit_value
     
     @staticmethod
-    def get_upgrade_benefits(current_plan: SubscriptionPlan) -> Dict:
+    @lru_cache(maxsize=8)
+    def get_upgrade_benefits(current_plan: SubscriptionPlan) -> Mapping:
         """
         Zeigt die Vorteile eines Upgrades
         
@@ -265,7 +317,7 @@ class SubscriptionService:
             current_plan: Aktueller Plan
             
         Returns:
-            Dictionary mit Upgrade-Vorteilen
+            Read-only Mapping mit Upgrade-Vorteilen (gecacht je Plan)
         """
         benefits = {}
         
@@ -283,7 +335,7 @@ class SubscriptionService:
                     'calls': '2000 statt 500',
                     'minutes': '500 statt 100'
                 },
-                'price_difference': PLAN_PRICES[SubscriptionPlan.PROFESSIONAL] - PLAN_PRICES[SubscriptionPlan.BASIC]
+                'price_difference': _UPGRADE_DELTA_BASIC_TO_PRO
             }
             
         elif current_plan == SubscriptionPlan.PROFESSIONAL:
@@ -301,10 +353,10 @@ class SubscriptionService:
                     'calls': 'Unlimited',
                     'minutes': '2000 included'
                 },
-                'price_difference': PLAN_PRICES[SubscriptionPlan.ENTERPRISE] - PLAN_PRICES[SubscriptionPlan.PROFESSIONAL]
+                'price_difference': _UPGRADE_DELTA_PRO_TO_ENT
             }
         
-        return benefits
+        return freeze(benefits)
     
     @staticmethod
     def calculate_overage_cost(
@@ -321,27 +373,40 @@ class SubscriptionService:
         Returns:
             Zusatzkosten in EUR
         """
-        limits = PLAN_LIMITS.get(plan)
-        if not limits:
+        try:
+            limits = PLAN_LIMITS[plan]
+        except KeyError:
             return 0.0
         
-        overage_cost = 0.0
+        overage_cents = 0
         
         # Minuten-Übernutzung
         included_minutes = limits.included_minutes
         used_minutes = usage.get('minutes', 0)
         if used_minutes > included_minutes:
             overage_minutes = used_minutes - included_minutes
-            overage_cost += overage_minutes * USAGE_PRICES['minute_overage']
+            overage_cents += overage_minutes * _PRICE_MINUTE_OVERAGE_CENTS
+        
+        auto_follow_up, lead_enrichment = _OVERAGE_FLAGS.get(plan, (False, False))
         
         # SMS Follow-Ups (nur wenn Feature verfügbar)
-        if SubscriptionService.has_feature(plan, Feature.AUTO_FOLLOW_UP):
+        if auto_follow_up:
             sms_count = usage.get('sms_follow_ups', 0)
-            overage_cost += sms_count * USAGE_PRICES['sms_follow_up']
+            overage_cents += sms_count * _PRICE_SMS_FOLLOW_UP_CENTS
         
         # Lead Enrichment (nur Enterprise)
-        if SubscriptionService.has_feature(plan, Feature.LEAD_ENRICHMENT):
+        if lead_enrichment:
             enrichment_count = usage.get('lead_enrichments', 0)
-            overage_cost += enrichment_count * USAGE_PRICES['lead_enrichment']
+            overage_cents += enrichment_count * _PRICE_LEAD_ENRICHMENT_CENTS
         
-        return round(overage_cost, 2)
\ No newline at end of file
+        return overage_cents / 100
+
+
+# Overage-relevante Features je Plan: (AUTO_FOLLOW_UP, LEAD_ENRICHMENT)
+_OVERAGE_FLAGS: Dict[SubscriptionPlan, Tuple[bool, bool]] = {
+    plan: (
+        SubscriptionService.has_feature(plan, Feature.AUTO_FOLLOW_UP),
+        SubscriptionService.has_feature(plan, Feature.LEAD_ENRICHMENT),
+    )
+    for plan in SubscriptionPlan
+}
@@ -3,30 +3,62 @@ Health Check Endpoint für Render.com
 Minimal memory footprint für Free Tier
 """
 from fastapi import APIRouter, status
-from typing import Dict
-import psutil
+from typing import Dict, Optional, Tuple
+import logging
 import os
+import time
 
+try:
+    import psutil
+except ImportError:  # psutil ist optional (nicht in requirements-minimal)
+    psutil = None
+
+logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Memory-Snapshot kurz cachen, damit Poll-Bursts nur einmal /proc/meminfo lesen
+MEMORY_SNAPSHOT_TTL = 2.0
+_memory_cache: Optional[Tuple[float, Tuple[float, float]]] = None
+
+
+def _memory_snapshot() -> Tuple[float, float]:
+    """Gibt (memory_usage_mb, memory_percent) zurück, max. alle 2s neu gelesen"""
+    global _memory_cache
+    now = time.monotonic()
+    if _memory_cache is not None and now - _memory_cache[0] < MEMORY_SNAPSHOT_TTL:
+        return _memory_cache[1]
+    
+    memory = psutil.virtual_memory()
+    memory_usage_mb = (memory.total - memory.available) / 1024 / 1024
+    snapshot = (round(memory_usage_mb, 2), round(memory.percent, 2))
+    _memory_cache = (now, snapshot)
+    return snapshot
+
+
 @router.get("/health", status_code=status.HTTP_200_OK)
 async def health_check() -> Dict:
     """Simple health check for Render monitoring"""
+    if psutil is None:
+        return {
+            "status": "healthy",
+            "service": "vocaliq-api"
+        }
+    
     try:
         # Memory usage (wichtig für Free Tier Monitoring)
-        memory = psutil.virtual_memory()
-        memory_usage_mb = (memory.total - memory.available) / 1024 / 1024
+        memory_usage_mb, memory_percent = _memory_snapshot()
         
         return {
             "status": "healthy",
             "service": "vocaliq-api",
-            "memory_usage_mb": round(memory_usage_mb, 2),
+            "memory_usage_mb": memory_usage_mb,
             "memory_limit_mb": 512,  # Render Free Tier
-            "memory_percent": round(memory.percent, 2),
+            "memory_percent": memory_percent,
             "environment": os.getenv("ENV", "development")
         }
-    except:
-        # Fallback wenn psutil nicht verfügbar
+    except (OSError, RuntimeError) as exc:
+        # Fallback wenn Memory-Daten nicht lesbar sind
+        logger.debug("Memory snapshot unavailable: %s", exc)
         return {
             "status": "healthy",
             "service": "vocaliq-api"
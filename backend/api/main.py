@@ -4,27 +4,47 @@ Intelligente Voice-Agent-Plattform für Business-Telefonie
 """
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
+import orjson
+import asyncio
+import importlib
 import time
 import logging
 from contextlib import asynccontextmanager
+from typing import List, Tuple
 from fastapi import APIRouter
 
 from api.core.config import get_settings
+from api.core.security import shutdown_password_pool
+from api.core.logging_config import setup_logging
 from api.routes.auth import router as auth_router
 from api.routes.calls import router as calls_router
-from api.middleware.rate_limiting import rate_limit_middleware
+from api.middleware.vocaliq import VocalIQMiddleware
+from api.middleware.trusted_host import FastTrustedHostMiddleware
 from api.health import router as health_router
+from api.core.database import (
+    create_database_engine,
+    create_tables,
+    close_database,
+    health_check as db_health_check,
+)
+
+# Externe Services einmalig importieren (optional, falls nicht konfiguriert)
+try:
+    from api.services.openai_service import openai_service
+except Exception:
+    openai_service = None
+
+try:
+    from api.services.elevenlabs_service import elevenlabs_service
+except Exception:
+    elevenlabs_service = None
 
 # Settings laden
 settings = get_settings()
 
-# Logging konfigurieren
-logging.basicConfig(
-    level=getattr(logging, settings.LOG_LEVEL),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Logging konfigurieren (Queue-basiert, Ausgabe im Hintergrund-Thread)
+setup_logging(settings.LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
 
@@ -32,22 +52,18 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """Anwendungsstart und -stopp Handler"""
     # Startup
-    logger.info(f"🚀 Starting VocalIQ API v{settings.API_VERSION}")
-    logger.info(f"Environment: {settings.ENVIRONMENT}")
-    logger.info(f"Debug mode: {settings.DEBUG}")
+    logger.info("🚀 Starting VocalIQ API v%s", settings.API_VERSION)
+    logger.info("Environment: %s", settings.ENVIRONMENT)
+    logger.info("Debug mode: %s", settings.DEBUG)
     
     # Initialize services
     try:
         # Database
-        from api.core.database import create_database_engine, create_tables
         create_database_engine()
         await create_tables()
         logger.info("✅ Database initialized")
         
-        # Health checks for external services
-        from api.services.openai_service import openai_service
-        from api.services.elevenlabs_service import elevenlabs_service
-        
+        # Health checks for external services (bereits beim Modul-Import geladen)
         # Initialize service health checks in background
         # (Don't block startup if services are temporarily unavailable)
         
@@ -57,13 +73,17 @@ async def lifespan(app: FastAPI):
         logger.info("✅ Scheduled Tasks Service started")
         
     except Exception as e:
-        logger.error(f"❌ Service initialization error: {str(e)}")
+        logger.error("❌ Service initialization error: %s", e)
         # Continue startup even if some services fail
     
+    # Restliche Router im Hintergrund nachladen, damit der Server sofort bindet
+    router_task = asyncio.create_task(_register_deferred_routers(app))
+    
     yield
     
     # Shutdown
     logger.info("🛑 Shutting down VocalIQ API")
+    router_task.cancel()
     
     # Stop Scheduled Tasks Service
     try:
@@ -71,15 +91,16 @@ async def lifespan(app: FastAPI):
         stop_scheduled_tasks()
         logger.info("✅ Scheduled Tasks Service stopped")
     except Exception as e:
-        logger.error(f"❌ Scheduled Tasks shutdown error: {str(e)}")
+        logger.error("❌ Scheduled Tasks shutdown error: %s", e)
+    
+    shutdown_password_pool()
     
     # Close database connections
     try:
-        from api.core.database import close_database
         await close_database()
         logger.info("✅ Database connections closed")
     except Exception as e:
-        logger.error(f"❌ Database shutdown error: {str(e)}")
+        logger.error("❌ Database shutdown error: %s", e)
 
 
 # FastAPI App erstellen
@@ -88,61 +109,41 @@ app = FastAPI(
     description="Intelligente Voice-Agent-Plattform für Business-Telefonie",
     version=settings.API_VERSION,
     debug=settings.DEBUG,
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS Middleware
+_ALLOWED_ORIGINS = settings.allowed_origins
+_ALLOWED_METHODS = ("GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS")
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.allowed_origins_list,
+    allow_origins=_ALLOWED_ORIGINS,
     allow_credentials=settings.CORS_ALLOW_CREDENTIALS,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
+    allow_methods=_ALLOWED_METHODS,
     allow_headers=["*"],
 )
 
-# Trusted Host Middleware (Security)
+# Trusted Host Middleware (Security) - Host-Liste einmalig dedupliziert
+_ALLOWED_HOSTS = tuple(dict.fromkeys((*_ALLOWED_ORIGINS, "localhost", "127.0.0.1")))
+
 if settings.is_production:
     app.add_middleware(
-        TrustedHostMiddleware,
-        allowed_hosts=settings.allowed_origins_list + ["localhost", "127.0.0.1"]
+        FastTrustedHostMiddleware,
+        allowed_hosts=_ALLOWED_HOSTS
     )
 
 
-# Rate Limiting Middleware (vor anderen Middlewares)
-app.middleware("http")(rate_limit_middleware)
-
-# Request/Response Middleware für Logging
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    """Request-Zeit messen und loggen"""
-    start_time = time.time()
-    
-    # Log incoming request
-    logger.info(f"📨 {request.method} {request.url.path} - {request.client.host if request.client else 'unknown'}")
-    
-    try:
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        
-        # Add process time header
-        response.headers["X-Process-Time"] = str(process_time)
-        
-        # Log response
-        logger.info(f"📤 {request.method} {request.url.path} - {response.status_code} ({process_time:.3f}s)")
-        
-        return response
-        
-    except Exception as e:
-        process_time = time.time() - start_time
-        logger.error(f"❌ {request.method} {request.url.path} - Error: {str(e)} ({process_time:.3f}s)")
-        raise
+# Rate Limiting + Request-Timing/Logging in einer Schicht (äußerste Schicht)
+app.add_middleware(VocalIQMiddleware)
 
 
 # Routes einbinden
 # app.include_router(auth_router)
 # app.include_router(calls_router)
 
-# Twilio/Demo werden weiter unten unter dem gebündelten /api Router registriert
+# Twilio/Demo werden im Lifespan unter einem eigenen /api Router registriert
 
 # Einheitlicher API-Router mit Prefix /api
 api_router = APIRouter(prefix="/api")
@@ -150,166 +151,112 @@ api_router.include_router(auth_router)
 api_router.include_router(calls_router)
 api_router.include_router(health_router)
 
-# Twilio Voice Router unter /api registrieren
-try:
-    from api.routers.twilio import router as twilio_router
-    api_router.include_router(twilio_router)
-    logger.info("✅ Twilio router registered")
-except ImportError as e:
-    logger.warning(f"⚠️ Twilio router not available: {e}")
-
-# Demo-Router unter /api registrieren
-from api.routes.demo import router as demo_router
-api_router.include_router(demo_router)
-
-# System-Router unter /api registrieren
-try:
-    from api.routes.system import router as system_router
-    api_router.include_router(system_router)
-    logger.info("✅ System router registered")
-except ImportError as e:
-    logger.warning(f"⚠️ System router not available: {e}")
-
-# Settings-Router unter /api registrieren
-try:
-    from api.routes.settings import router as settings_router
-    api_router.include_router(settings_router)
-    logger.info("✅ Settings router registered")
-except ImportError as e:
-    logger.warning(f"⚠️ Settings router not available: {e}")
-
-# Lead Management Router unter /api registrieren
-try:
-    from api.routes.lead_management import router as lead_management_router
-    api_router.include_router(lead_management_router)
-    logger.info("✅ Lead Management router registered")
-except ImportError as e:
-    logger.warning(f"⚠️ Lead Management router not available: {e}")
-
-# Follow-Up Router unter /api registrieren
-try:
-    from api.routes.follow_ups import router as follow_ups_router
-    api_router.include_router(follow_ups_router)
-    logger.info("✅ Follow-Ups router registered")
-except ImportError as e:
-    logger.warning(f"⚠️ Follow-Ups router not available: {e}")
-
-# Admin Lead Router unter /api registrieren
-try:
-    from api.routes.admin_leads import router as admin_leads_router
-    api_router.include_router(admin_leads_router)
-    logger.info("✅ Admin Leads router registered")
-except ImportError as e:
-    logger.warning(f"⚠️ Admin Leads router not available: {e}")
+# Demo- und optionale Router werden erst im Lifespan registriert (siehe unten)
 
-# Scheduled Tasks Router unter /api registrieren
-try:
-    from api.routes.scheduled_tasks import router as scheduled_tasks_router
-    api_router.include_router(scheduled_tasks_router)
-    logger.info("✅ Scheduled Tasks router registered")
-except ImportError as e:
-    logger.warning(f"⚠️ Scheduled Tasks router not available: {e}")
-
-# Knowledge-Router unter /api registrieren
-try:
-    from api.routes.knowledge import router as knowledge_router
-    api_router.include_router(knowledge_router)
-    logger.info("✅ Knowledge router registered")
-except ImportError as e:
-    logger.warning(f"⚠️ Knowledge router not available: {e}")
-
-# Phone Numbers Router unter /api registrieren
-try:
-    from api.routes.phone_numbers import router as phone_numbers_router
-    api_router.include_router(phone_numbers_router)
-    logger.info("✅ Phone Numbers router registered")
-except ImportError as e:
-    logger.warning(f"⚠️ Phone Numbers router not available: {e}")
-
-# Webhooks Router unter /api registrieren
-try:
-    from api.routes.webhooks import router as webhooks_router
-    api_router.include_router(webhooks_router)
-    logger.info("✅ Webhooks router registered")
-except ImportError as e:
-    logger.warning(f"⚠️ Webhooks router not available: {e}")
+# Root-API-Router an App hängen
+app.include_router(api_router)
 
-# Test Call Router unter /api registrieren
-try:
-    from api.routes.test_call import router as test_call_router
-    api_router.include_router(test_call_router)
-    logger.info("✅ Test Call router registered")
-except ImportError as e:
-    logger.warning(f"⚠️ Test Call router not available: {e}")
+# Verzögert registrierte Router unter /api: (Modul, Router-Attribut, Name für Logs)
+_OPTIONAL_ROUTERS = (
+    ("api.routes.demo", "router", "Demo"),
+    ("api.routers.twilio", "router", "Twilio"),
+    ("api.routes.system", "router", "System"),
+    ("api.routes.settings", "router", "Settings"),
+    ("api.routes.lead_management", "router", "Lead Management"),
+    ("api.routes.follow_ups", "router", "Follow-Ups"),
+    ("api.routes.admin_leads", "router", "Admin Leads"),
+    ("api.routes.scheduled_tasks", "router", "Scheduled Tasks"),
+    ("api.routes.knowledge", "router", "Knowledge"),
+    ("api.routes.phone_numbers", "router", "Phone Numbers"),
+    ("api.routes.webhooks", "router", "Webhooks"),
+    ("api.routes.test_call", "router", "Test Call"),
+    ("api.routes.companies", "router", "Companies"),
+    ("api.routes.users", "router", "Users"),
+    ("api.routes.voices", "router", "Voices"),
+    ("api.routes.voice_chat", "router", "Voice Chat"),
+    ("api.routes.audio", "router", "Audio"),
+)
 
-# Companies Router unter /api registrieren
-try:
-    from api.routes.companies import router as companies_router
-    api_router.include_router(companies_router)
-    logger.info("✅ Companies router registered")
-except ImportError as e:
-    logger.warning(f"⚠️ Companies router not available: {e}")
+# Wird gesetzt, sobald alle verzögerten Router registriert sind
+_ready = asyncio.Event()
+# Router, die nicht geladen werden konnten (für /health/ready)
+_missing_routers: List[str] = []
+
+
+async def _register_optional(
+    router: APIRouter, table: Tuple[Tuple[str, str, str], ...]
+) -> List[str]:
+    """Router aus der Tabelle importieren (im Thread, Event-Loop bleibt frei) und einhängen"""
+    registered = []
+    for module_name, attr, label in table:
+        try:
+            module = await asyncio.to_thread(importlib.import_module, module_name)
+            router.include_router(getattr(module, attr))
+            registered.append(label)
+        except ImportError as e:
+            logger.warning("⚠️ %s router not available: %s", label, e)
+        except Exception:
+            # Ein defekter Router darf die übrigen nicht mitreißen
+            logger.exception("❌ %s router (%s) failed to load, skipping", label, module_name)
+    return registered
+
+
+async def _register_deferred_routers(app: FastAPI) -> None:
+    """Demo- und optionale Router nachladen und unter /api registrieren"""
+    deferred_router = APIRouter(prefix="/api")
+    registered_routers = await _register_optional(deferred_router, _OPTIONAL_ROUTERS)
+    
+    app.include_router(deferred_router)
+    # OpenAPI-Schema neu erzeugen lassen, falls es vorher schon abgerufen wurde
+    app.openapi_schema = None
+    _missing_routers[:] = [label for _, _, label in _OPTIONAL_ROUTERS if label not in registered_routers]
+    _ready.set()
+    logger.info("✅ Routers registered: %s", ", ".join(registered_routers))
+    if _missing_routers:
+        logger.warning("⚠️ Routers missing: %s", ", ".join(_missing_routers))
 
-# Users Router unter /api registrieren
-try:
-    from api.routes.users import router as users_router
-    api_router.include_router(users_router)
-    logger.info("✅ Users router registered")
-except ImportError as e:
-    logger.warning(f"⚠️ Users router not available: {e}")
 
-# Voices Router unter /api registrieren
-try:
-    from api.routes.voices import router as voices_router
-    api_router.include_router(voices_router)
-    logger.info("✅ Voices router registered")
-except ImportError as e:
+# Root Endpoints
+# Antwort hängt nur von den (gecachten) Settings ab - einmal vorserialisieren
+_ROOT_PAYLOAD = {
+    "service": "VocalIQ API",
+    "version": settings.API_VERSION,
+    "environment": settings.ENVIRONMENT,
+    "status": "operational",
+    "features": {
+        "authentication": True,
+        "voice_calls": True,
+        "text_to_speech": True,
+        "speech_to_text": True,
+        "ai_conversation": True,
+        "calendar_integration": settings.FEATURE_CALENDAR_INTEGRATION,
+        "analytics": settings.FEATURE_ANALYTICS,
+        "webhooks": settings.FEATURE_WEBHOOKS
+    },
+    "docs": f"{settings.API_BASE_URL}/docs",
+    "redoc": f"{settings.API_BASE_URL}/redoc"
+}
+_ROOT_BYTES = orjson.dumps(_ROOT_PAYLOAD)
 
-    logger.warning(f"⚠️ Voices router not available: {e}")
-# Audio Router unter /api registrieren
 
-# Voice Chat Router unter /api registrieren
-try:
-    from api.routes.voice_chat import router as voice_chat_router
-    api_router.include_router(voice_chat_router)
-    logger.info("✅ Voice Chat router registered")
-except ImportError as e:
-    logger.warning(f"⚠️ Voice Chat router not available: {e}")
+@app.get("/", tags=["Root"])
+async def root():
+    """API Root - Basis-Informationen"""
+    return Response(content=_ROOT_BYTES, media_type="application/json")
 
-try:
-    from api.routes.audio import router as audio_router
-    api_router.include_router(audio_router)
-    logger.info("✅ Audio router registered")
-except ImportError as e:
-    logger.warning(f"⚠️ Audio router not available: {e}")
-    logger.warning(f"⚠️ Voices router not available: {e}")
 
-# Root-API-Router an App hängen
-app.include_router(api_router)
+@app.get("/health/live", tags=["Health"])
+async def health_live():
+    """Liveness Probe - Prozess läuft"""
+    return {"status": "alive"}
 
 
-# Root Endpoints
-@app.get("/", tags=["Root"])
-async def root():
-    """API Root - Basis-Informationen"""
-    return {
-        "service": "VocalIQ API",
-        "version": settings.API_VERSION,
-        "environment": settings.ENVIRONMENT,
-        "status": "operational",
-        "features": {
-            "authentication": True,
-            "voice_calls": True,
-            "text_to_speech": True,
-            "speech_to_text": True,
-            "ai_conversation": True,
-            "calendar_integration": settings.FEATURE_CALENDAR_INTEGRATION,
-            "analytics": settings.FEATURE_ANALYTICS,
-            "webhooks": settings.FEATURE_WEBHOOKS
-        },
-        "docs": f"{settings.API_BASE_URL}/docs",
-        "redoc": f"{settings.API_BASE_URL}/redoc"
-    }
+@app.get("/health/ready", tags=["Health"])
+async def health_ready():
+    """Readiness Probe - 503 bis die Router-Registrierung durchgelaufen ist"""
+    if not _ready.is_set():
+        return ORJSONResponse(status_code=503, content={"status": "starting"})
+    return {"status": "ready", "missing_routers": _missing_routers}
 
 
 @app.get("/health", tags=["Health"])
@@ -319,30 +266,33 @@ async def health():
     
     # Database health check
     try:
-        from api.core.database import health_check as db_health_check
         db_status = await db_health_check()
         services_status["database"] = db_status["status"]
     except Exception as e:
         services_status["database"] = f"error: {str(e)}"
     
     # External services health checks (non-blocking)
-    try:
-        from api.services.openai_service import openai_service
-        openai_status = await openai_service.health_check()
-        services_status["openai"] = openai_status["status"]
-    except Exception:
+    if openai_service is None:
         services_status["openai"] = "not_configured"
+    else:
+        try:
+            openai_status = await openai_service.health_check()
+            services_status["openai"] = openai_status["status"]
+        except Exception:
+            services_status["openai"] = "not_configured"
     
-    try:
-        from api.services.elevenlabs_service import elevenlabs_service
-        elevenlabs_status = await elevenlabs_service.health_check()
-        services_status["elevenlabs"] = elevenlabs_status["status"]
-    except Exception:
+    if elevenlabs_service is None:
         services_status["elevenlabs"] = "not_configured"
+    else:
+        try:
+            elevenlabs_status = await elevenlabs_service.health_check()
+            services_status["elevenlabs"] = elevenlabs_status["status"]
+        except Exception:
+            services_status["elevenlabs"] = "not_configured"
     
     # Overall status
     overall_status = "healthy"
-    if "error" in str(services_status.values()):
+    if any(isinstance(value, str) and value.startswith("error") for value in services_status.values()):
         overall_status = "degraded"
     if services_status.get("database") == "error":
         overall_status = "unhealthy"
@@ -372,11 +322,12 @@ async def metrics():
 @app.exception_handler(404)
 async def not_found_handler(request: Request, exc: HTTPException):
     """404 Not Found Handler"""
-    return JSONResponse(
+    path = request.scope.get("path", "?")
+    return ORJSONResponse(
         status_code=404,
         content={
             "error": "Not Found",
-            "message": f"The requested resource {request.url.path} was not found",
+            "message": f"The requested resource {path} was not found",
             "status_code": 404
         }
     )
@@ -385,8 +336,8 @@ async def not_found_handler(request: Request, exc: HTTPException):
 @app.exception_handler(500)
 async def internal_error_handler(request: Request, exc: Exception):
     """500 Internal Server Error Handler"""
-    logger.error(f"Internal error on {request.url.path}: {str(exc)}")
-    return JSONResponse(
+    logger.error("Internal error on %s: %s", request.scope.get("path", "?"), exc)
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "Internal Server Error",
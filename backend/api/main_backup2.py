@@ -90,7 +90,7 @@ app.add_middleware(
 if settings.is_production:
     app.add_middleware(
         TrustedHostMiddleware,
-        allowed_hosts=settings.allowed_origins_list + ["localhost", "127.0.0.1"]
+        allowed_hosts=[*settings.allowed_origins_list, "localhost", "127.0.0.1"]
     )
 
 
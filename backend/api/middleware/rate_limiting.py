@@ -4,61 +4,113 @@ Schutz vor API-Missbrauch mit Redis-basiertem Rate-Limiting
 """
 import time
 import hashlib
-from typing import Dict, Optional, Tuple
+import heapq
+from collections import deque
+from functools import lru_cache
+from typing import TYPE_CHECKING, Deque, Dict, List, Optional, Tuple
 from fastapi import Request, Response, HTTPException, status
-from fastapi.responses import JSONResponse
-import redis
+from fastapi.responses import ORJSONResponse
+from starlette.datastructures import Headers
 import logging
 from contextlib import asynccontextmanager
 
 from api.core.config import get_settings
 
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
-# Redis Client für Rate-Limiting
-try:
-    redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
-except Exception as e:
-    logger.warning(f"Redis connection failed: {e}. Rate limiting will be disabled.")
-    redis_client = None
+# Sliding-Window-Approximation mit zwei Zählern (aktuelles + vorheriges Fenster),
+# atomar in einem Redis-Roundtrip:
+# KEYS[1] = aktuelles Fenster, KEYS[2] = vorheriges Fenster
+# ARGV[1] = Limit, ARGV[2] = TTL in ms, ARGV[3] = Gewicht des vorherigen Fensters
+_SLIDING_WINDOW_LUA = """
+local limit = tonumber(ARGV[1])
+local prev = tonumber(redis.call('GET', KEYS[2]) or '0')
+local curr = tonumber(redis.call('GET', KEYS[1]) or '0')
+local estimated = math.floor(prev * tonumber(ARGV[3])) + curr
+if estimated >= limit then
+    return {0, 0}
+end
+if redis.call('INCR', KEYS[1]) == 1 then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return {1, limit - estimated - 1}
+"""
+
+# Redis Client für Rate-Limiting (lazy, erst beim ersten Request erstellt)
+_redis_client: Optional["Redis"] = None
+_redis_unavailable = False
+
+
+def _get_redis() -> Optional["Redis"]:
+    """Redis-Client beim ersten Aufruf erstellen (mit gemeinsamem Connection-Pool)"""
+    global _redis_client, _redis_unavailable
+    if _redis_client is None and not _redis_unavailable:
+        try:
+            from redis.asyncio import ConnectionPool, Redis
+            
+            pool = ConnectionPool.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                max_connections=64,
+                socket_keepalive=True,
+            )
+            _redis_client = Redis(connection_pool=pool)
+        except Exception as e:
+            logger.warning(f"Redis connection failed: {e}. Rate limiting will be disabled.")
+            _redis_unavailable = True
+    return _redis_client
+
+
+@lru_cache(maxsize=4096)
+def _hash_token(token: str) -> str:
+    """Gekürzter SHA-256 eines API-Keys/JWTs (wiederkehrende Tokens aus dem Cache)"""
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
 
 
 class RateLimiter:
     """Advanced Rate Limiter mit verschiedenen Strategien"""
     
-    def __init__(self, redis_client: Optional[redis.Redis] = None):
-        self.redis = redis_client
-        self.local_cache = {}  # Fallback bei Redis-Ausfall
-        self.cache_cleanup_time = time.time()
+    def __init__(self, redis_client: Optional["Redis"] = None):
+        self._redis = redis_client
+        self._window_script = None  # per EVALSHA aufgerufen, SHA wird einmalig geladen
+        self.local_cache: Dict[str, Deque[int]] = {}  # Fallback bei Redis-Ausfall
+        self._expiry_heap: List[Tuple[int, str, int]] = []  # (Ablaufzeit, Key, Fenster)
     
-    def _get_client_id(self, request: Request) -> str:
+    @property
+    def redis(self) -> Optional["Redis"]:
+        """Injizierter Client oder lazy erstellter Modul-Client"""
+        return self._redis if self._redis is not None else _get_redis()
+    
+    def _get_client_id(self, headers: Headers, client: Optional[Tuple[str, int]]) -> str:
         """Eindeutige Client-Identifikation"""
         # Priorität: API-Key > JWT-Token > IP-Adresse
         
         # 1. API-Key aus Header
-        api_key = request.headers.get("X-API-Key")
+        api_key = headers.get("X-API-Key")
         if api_key:
-            return f"api_key:{hashlib.sha256(api_key.encode()).hexdigest()[:16]}"
+            return f"api_key:{_hash_token(api_key)}"
         
         # 2. JWT-Token aus Authorization Header
-        auth_header = request.headers.get("Authorization")
+        auth_header = headers.get("Authorization")
         if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header[7:]
-            return f"jwt:{hashlib.sha256(token.encode()).hexdigest()[:16]}"
+            return f"jwt:{_hash_token(auth_header[7:])}"
         
         # 3. IP-Adresse (mit X-Forwarded-For Support)
-        forwarded_for = request.headers.get("X-Forwarded-For")
+        forwarded_for = headers.get("X-Forwarded-For")
         if forwarded_for:
-            ip = forwarded_for.split(",")[0].strip()
+            ip = forwarded_for.partition(",")[0].strip()
         else:
-            ip = request.client.host if request.client else "unknown"
+            ip = client[0] if client else "unknown"
         
         return f"ip:{ip}"
     
-    def _get_rate_limit_key(self, client_id: str, endpoint: str, window: str) -> str:
-        """Rate-Limit-Key generieren"""
-        return f"rate_limit:{client_id}:{endpoint}:{window}"
+    def _get_rate_limit_key(self, client_id: str, endpoint: str) -> str:
+        """Rate-Limit-Key generieren (Fenster-ID wird im Counter angehängt)"""
+        return f"rate_limit:{client_id}:{endpoint}"
     
     def _parse_rate_limit(self, rate_limit_str: str) -> Tuple[int, int]:
         """Parse Rate-Limit String (z.B. "100/minute")"""
@@ -77,49 +129,35 @@ class RateLimiter:
         except Exception:
             return 100, 60  # Default: 100 requests per minute
     
-    def _sliding_window_counter(
+    async def _sliding_window_counter(
         self, 
         key: str, 
         limit: int, 
         window: int
     ) -> Tuple[bool, int, int]:
-        """Sliding Window Counter Algorithm"""
-        current_time = int(time.time())
-        window_start = current_time - window
-        
-        if self.redis:
+        """Sliding Window Counter (zwei Fenster, gewichtet, per Lua-Script)"""
+        redis_client = self.redis
+        if redis_client:
             try:
-                pipe = self.redis.pipeline()
-                
-                # Remove expired entries
-                pipe.zremrangebyscore(key, 0, window_start)
-                
-                # Count current requests
-                pipe.zcard(key)
+                if self._window_script is None:
+                    self._window_script = redis_client.register_script(_SLIDING_WINDOW_LUA)
                 
-                # Add current request
-                pipe.zadd(key, {str(current_time): current_time})
-                
-                # Set expiration
-                pipe.expire(key, window + 10)
-                
-                results = pipe.execute()
-                current_count = results[1] + 1
-                
-                if current_count <= limit:
-                    remaining = limit - current_count
-                    return True, remaining, window
-                else:
-                    # Remove the request we just added since we're over limit
-                    self.redis.zrem(key, str(current_time))
-                    return False, 0, window
+                # Fenster-ID bleibt Wall-Clock: Redis-Keys werden von allen Workern/Hosts geteilt
+                window_id, elapsed = divmod(time.time(), window)
+                window_id = int(window_id)
+                # Aktueller Zähler muss zwei Fenster leben, da er danach als "prev" dient
+                allowed, remaining = await self._window_script(
+                    keys=[f"{key}:{window_id}", f"{key}:{window_id - 1}"],
+                    args=[limit, window * 2000, 1 - elapsed / window],
+                    client=redis_client,
+                )
+                return bool(allowed), remaining, window
                     
             except Exception as e:
                 logger.error(f"Redis error in rate limiting: {e}")
-                # Fallback to local cache
-                return self._local_fallback(key, limit, window, current_time)
-        else:
-            return self._local_fallback(key, limit, window, current_time)
+        
+        # Fallback to local cache (prozesslokal, daher monotone Uhr ohne NTP-Sprünge)
+        return self._local_fallback(key, limit, window, int(time.monotonic()))
     
     def _local_fallback(
         self, 
@@ -129,156 +167,176 @@ class RateLimiter:
         current_time: int
     ) -> Tuple[bool, int, int]:
         """Fallback auf lokalen Cache wenn Redis nicht verfügbar"""
-        # Cleanup old entries periodically
-        if current_time - self.cache_cleanup_time > 300:  # Every 5 minutes
-            self._cleanup_local_cache(current_time)
-            self.cache_cleanup_time = current_time
+        self._evict_expired(current_time)
         
-        if key not in self.local_cache:
-            self.local_cache[key] = []
+        bucket = self.local_cache.get(key)
+        if bucket is None:
+            bucket = self.local_cache[key] = deque()
+            heapq.heappush(self._expiry_heap, (current_time + window, key, window))
         
-        # Remove expired requests
+        # Remove expired requests (älteste stehen vorne)
         window_start = current_time - window
-        self.local_cache[key] = [
-            req_time for req_time in self.local_cache[key] 
-            if req_time > window_start
-        ]
+        while bucket and bucket[0] <= window_start:
+            bucket.popleft()
         
-        current_count = len(self.local_cache[key])
+        current_count = len(bucket)
         
         if current_count < limit:
-            self.local_cache[key].append(current_time)
+            bucket.append(current_time)
             remaining = limit - current_count - 1
             return True, remaining, window
         else:
             return False, 0, window
     
-    def _cleanup_local_cache(self, current_time: int):
-        """Lokalen Cache aufräumen"""
-        for key in list(self.local_cache.keys()):
-            # Remove entries older than 1 hour
-            self.local_cache[key] = [
-                req_time for req_time in self.local_cache[key]
-                if current_time - req_time < 3600
-            ]
-            # Remove empty entries
-            if not self.local_cache[key]:
+    def _evict_expired(self, current_time: int):
+        """Abgelaufene Keys über die Expiry-Queue entfernen (ohne Full-Scan)"""
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= current_time:
+            _, key, window = heapq.heappop(heap)
+            bucket = self.local_cache.get(key)
+            if bucket is None:
+                continue
+            if bucket and bucket[-1] + window > current_time:
+                # Key noch aktiv - nach Ablauf des letzten Requests erneut prüfen
+                heapq.heappush(heap, (bucket[-1] + window, key, window))
+            else:
                 del self.local_cache[key]
     
-    def check_rate_limit(
+    async def check_rate_limit(
         self, 
         request: Request, 
         rate_limit: str
-    ) -> Tuple[bool, Dict[str, int]]:
-        """Rate-Limit prüfen"""
+    ) -> Tuple[bool, int, int]:
+        """Rate-Limit prüfen -> (allowed, remaining, reset)"""
+        limit, window = self._parse_rate_limit(rate_limit)
+        return await self.check_scope_rate_limit(
+            request.headers, request.client, request.scope["path"], limit, window
+        )
+    
+    async def check_scope_rate_limit(
+        self,
+        headers: Headers,
+        client: Optional[Tuple[str, int]],
+        endpoint: str,
+        limit: int,
+        window: int
+    ) -> Tuple[bool, int, int]:
+        """Rate-Limit prüfen (direkt aus ASGI-Scope-Daten) -> (allowed, remaining, reset)"""
         if not settings.RATE_LIMIT_ENABLED:
-            return True, {"remaining": 9999, "reset": 3600}
+            return True, 9999, 3600
         
-        client_id = self._get_client_id(request)
-        endpoint = request.url.path
-        limit, window = self._parse_rate_limit(rate_limit)
+        client_id = self._get_client_id(headers, client)
         
-        # Create unique key for this endpoint and time window
-        window_id = int(time.time()) // window
-        key = self._get_rate_limit_key(client_id, endpoint, str(window_id))
+        key = self._get_rate_limit_key(client_id, endpoint)
         
-        allowed, remaining, reset_time = self._sliding_window_counter(
+        allowed, remaining, reset_time = await self._sliding_window_counter(
             key, limit, window
         )
         
-        headers = {
-            "remaining": remaining,
-            "reset": reset_time
-        }
-        
         if not allowed:
             logger.warning(
                 f"Rate limit exceeded for {client_id} on {endpoint}: "
                 f"{limit} requests per {window}s"
             )
         
-        return allowed, headers
+        return allowed, remaining, reset_time
 
 
 # Global Rate Limiter Instance
-rate_limiter = RateLimiter(redis_client)
+rate_limiter = RateLimiter()
 
 
-def get_endpoint_rate_limit(path: str) -> str:
-    """Bestimme Rate-Limit basierend auf Endpoint"""
-    endpoint_limits = {
-        # Authentication endpoints
-        "/api/auth/login": "10/minute",
-        "/api/auth/refresh": "30/minute",
-        
-        # Call endpoints (resource-intensive)
-        "/api/calls/": "20/minute",
-        "/api/calls/outbound": "10/minute",
-        
-        # Audio processing (sehr resource-intensive)
-        "/api/audio/transcribe": "5/minute",
-        "/api/audio/synthesize": "10/minute",
-        
-        # AI conversation
-        "/api/ai/conversation": "50/minute",
-        
-        # Webhooks (hoher Durchsatz erlaubt)
-        "/api/webhooks/": "200/minute",
-        
-        # General API endpoints
-        "/api/users/": "100/minute",
-        "/api/organizations/": "100/minute",
-        
-        # Analytics (read-heavy)
-        "/api/analytics/": "200/minute",
-    }
+# Endpoint-spezifische Rate-Limits (Präfix -> "N/period")
+ENDPOINT_RATE_LIMITS: Dict[str, str] = {
+    # Authentication endpoints
+    "/api/auth/login": "10/minute",
+    "/api/auth/refresh": "30/minute",
     
-    # Find matching pattern
-    for pattern, limit in endpoint_limits.items():
-        if path.startswith(pattern):
-            return limit
+    # Call endpoints (resource-intensive)
+    "/api/calls/": "20/minute",
+    "/api/calls/outbound": "10/minute",
     
-    # Default rate limit
-    return settings.RATE_LIMIT_GENERAL
-
-
-async def rate_limit_middleware(request: Request, call_next):
-    """Rate-Limiting Middleware für FastAPI"""
-    # Skip rate limiting for health checks and docs
-    skip_paths = ["/health", "/docs", "/redoc", "/openapi.json"]
-    if any(request.url.path.startswith(path) for path in skip_paths):
-        response = await call_next(request)
-        return response
+    # Audio processing (sehr resource-intensive)
+    "/api/audio/transcribe": "5/minute",
+    "/api/audio/synthesize": "10/minute",
     
-    # Get rate limit for this endpoint
-    rate_limit = get_endpoint_rate_limit(request.url.path)
+    # AI conversation
+    "/api/ai/conversation": "50/minute",
     
-    # Check rate limit
-    allowed, headers = rate_limiter.check_rate_limit(request, rate_limit)
+    # Webhooks (hoher Durchsatz erlaubt)
+    "/api/webhooks/": "200/minute",
     
-    if not allowed:
-        return JSONResponse(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            content={
-                "error": "Rate Limit Exceeded",
-                "message": f"Too many requests. Rate limit: {rate_limit}",
-                "retry_after": headers["reset"]
-            },
-            headers={
-                "X-RateLimit-Remaining": str(headers["remaining"]),
-                "X-RateLimit-Reset": str(headers["reset"]),
-                "Retry-After": str(headers["reset"])
-            }
-        )
-    
-    # Process request
-    response = await call_next(request)
+    # General API endpoints
+    "/api/users/": "100/minute",
+    "/api/organizations/": "100/minute",
     
-    # Add rate limit headers to response
-    response.headers["X-RateLimit-Remaining"] = str(headers["remaining"])
-    response.headers["X-RateLimit-Reset"] = str(headers["reset"])
-    
-    return response
+    # Analytics (read-heavy)
+    "/api/analytics/": "200/minute",
+}
+
+# (Original-String, Limit, Fenster in Sekunden)
+EndpointLimit = Tuple[str, int, int]
+
+# Schlüssel für den Wert eines Trie-Knotens (kollidiert nie mit einem Einzelzeichen)
+_TRIE_VALUE = ""
+
+
+def _parsed_limit(rate_limit: str) -> EndpointLimit:
+    """Rate-Limit-String einmalig parsen"""
+    return (rate_limit, *rate_limiter._parse_rate_limit(rate_limit))
+
+
+def _build_endpoint_trie(limits: Dict[str, str]) -> dict:
+    """Präfix-Trie (dict-of-dicts) mit vorgeparsten Limits aufbauen"""
+    root: dict = {}
+    for pattern, rate_limit in limits.items():
+        node = root
+        for char in pattern:
+            node = node.setdefault(char, {})
+        node[_TRIE_VALUE] = _parsed_limit(rate_limit)
+    return root
+
+
+_ENDPOINT_TRIE = _build_endpoint_trie(ENDPOINT_RATE_LIMITS)
+_DEFAULT_LIMIT = _parsed_limit(settings.RATE_LIMIT_GENERAL)
+
+
+def get_endpoint_rate_limit(path: str) -> EndpointLimit:
+    """Bestimme Rate-Limit basierend auf Endpoint (längster passender Präfix)"""
+    match = _DEFAULT_LIMIT
+    node = _ENDPOINT_TRIE
+    for char in path:
+        node = node.get(char)
+        if node is None:
+            break
+        match = node.get(_TRIE_VALUE, match)
+    return match
+
+
+# Skip rate limiting for health checks and docs
+SKIP_PATHS = frozenset({"/health", "/docs", "/redoc", "/openapi.json"})
+SKIP_PREFIXES = ("/health/", "/docs/", "/redoc/")
+
+# Rate-Limit-Header (ASGI-Namen sind lowercase bytes)
+HEADER_REMAINING = b"x-ratelimit-remaining"
+HEADER_RESET = b"x-ratelimit-reset"
+
+
+def rate_limit_exceeded_response(rate_limit: str, remaining: int, reset: int) -> ORJSONResponse:
+    """429-Antwort für die Middleware (siehe api.middleware.vocaliq)"""
+    return ORJSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={
+            "error": "Rate Limit Exceeded",
+            "message": f"Too many requests. Rate limit: {rate_limit}",
+            "retry_after": reset
+        },
+        headers={
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(reset),
+            "Retry-After": str(reset)
+        }
+    )
 
 
 class RateLimitDependency:
@@ -286,10 +344,18 @@ class RateLimitDependency:
     
     def __init__(self, rate_limit: str):
         self.rate_limit = rate_limit
+        self.limit, self.window = rate_limiter._parse_rate_limit(rate_limit)
     
     async def __call__(self, request: Request):
         """Rate-Limit-Check als Dependency"""
-        allowed, headers = rate_limiter.check_rate_limit(request, self.rate_limit)
+        # Gleiches Limit wurde schon von der Middleware geprüft - Ergebnis wiederverwenden
+        cached = getattr(request.state, "rate_limit_result", None)
+        if cached is not None and cached[3] == self.rate_limit:
+            allowed, remaining, reset = cached[:3]
+        else:
+            allowed, remaining, reset = await rate_limiter.check_scope_rate_limit(
+                request.headers, request.client, request.scope["path"], self.limit, self.window
+            )
         
         if not allowed:
             raise HTTPException(
@@ -297,16 +363,16 @@ class RateLimitDependency:
                 detail={
                     "error": "Rate Limit Exceeded",
                     "message": f"Too many requests. Rate limit: {self.rate_limit}",
-                    "retry_after": headers["reset"]
+                    "retry_after": reset
                 },
                 headers={
-                    "X-RateLimit-Remaining": str(headers["remaining"]),
-                    "X-RateLimit-Reset": str(headers["reset"]),
-                    "Retry-After": str(headers["reset"])
+                    "X-RateLimit-Remaining": str(remaining),
+                    "X-RateLimit-Reset": str(reset),
+                    "Retry-After": str(reset)
                 }
             )
         
-        return headers
+        return {"remaining": remaining, "reset": reset}
 
 
 # Predefined Rate Limit Dependencies
@@ -0,0 +1,54 @@
+"""
+VocalIQ Trusted-Host Middleware
+Host-Header-Prüfung mit vorkompilierten Host-Sets statt linearer Suche
+"""
+from typing import Optional, Sequence
+
+from starlette.datastructures import URL, Headers
+from starlette.middleware.trustedhost import TrustedHostMiddleware
+from starlette.responses import PlainTextResponse, RedirectResponse, Response
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class FastTrustedHostMiddleware(TrustedHostMiddleware):
+    """
+    TrustedHostMiddleware mit O(1)-Lookup für exakte Hosts und einem einzigen
+    endswith()-Aufruf für Wildcard-Patterns (*.example.com). Verhalten wie Starlette.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        allowed_hosts: Optional[Sequence[str]] = None,
+        www_redirect: bool = True,
+    ) -> None:
+        super().__init__(app, allowed_hosts=allowed_hosts, www_redirect=www_redirect)
+        self._exact_hosts = frozenset(
+            pattern for pattern in self.allowed_hosts if not pattern.startswith("*")
+        )
+        # "*.example.com" -> ".example.com"
+        self._wildcard_suffixes = tuple(
+            pattern[1:] for pattern in self.allowed_hosts if pattern.startswith("*.")
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.allow_any or scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        host = Headers(scope=scope).get("host", "").partition(":")[0]
+
+        if host in self._exact_hosts or (
+            self._wildcard_suffixes and host.endswith(self._wildcard_suffixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        response: Response
+        if self.www_redirect and "www." + host in self._exact_hosts:
+            url = URL(scope=scope)
+            redirect_url = url.replace(netloc="www." + url.netloc)
+            response = RedirectResponse(url=str(redirect_url))
+        else:
+            response = PlainTextResponse("Invalid host header", status_code=400)
+        await response(scope, receive, send)
@@ -0,0 +1,101 @@
+"""
+VocalIQ Request-Middleware
+Rate-Limiting, Request-Timing und Logging in einer einzigen ASGI-Schicht
+"""
+import logging
+import time
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.middleware.rate_limiting import (
+    HEADER_REMAINING,
+    HEADER_RESET,
+    SKIP_PATHS,
+    SKIP_PREFIXES,
+    get_endpoint_rate_limit,
+    rate_limit_exceeded_response,
+    rate_limiter,
+)
+
+logger = logging.getLogger(__name__)
+
+_RATE_LIMIT_HEADER_NAMES = (HEADER_REMAINING, HEADER_RESET)
+
+
+class VocalIQMiddleware:
+    """
+    Prüft das Rate-Limit, setzt X-RateLimit-* und X-Process-Time und loggt
+    Request/Response - mit nur einem send-Wrapper pro Request
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._log_info = logger.info
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        method = scope["method"]
+        path = scope["path"]
+        status_code = 500
+
+        # Log incoming request (Client-Lookup nur wenn INFO aktiv)
+        if logger.isEnabledFor(logging.INFO):
+            client = scope.get("client")
+            self._log_info("📨 %s %s - %s", method, path, client[0] if client else "unknown")
+
+        app = self.app
+        rate_limit_headers = ()
+
+        # Rate Limiting (Health-Checks und Docs ausgenommen)
+        if path not in SKIP_PATHS and not path.startswith(SKIP_PREFIXES):
+            rate_limit, limit, window = get_endpoint_rate_limit(path)
+            allowed, remaining, reset = await rate_limiter.check_scope_rate_limit(
+                Headers(scope=scope), scope.get("client"), path, limit, window
+            )
+
+            # Entscheidung für RateLimitDependency merken (landet in request.state)
+            scope.setdefault("state", {})["rate_limit_result"] = (allowed, remaining, reset, rate_limit)
+
+            if allowed:
+                rate_limit_headers = (
+                    (HEADER_REMAINING, b"%d" % remaining),
+                    (HEADER_RESET, b"%d" % reset),
+                )
+            else:
+                # 429 läuft ebenfalls durch send_wrapper (Timing + Logging)
+                app = rate_limit_exceeded_response(rate_limit, remaining, reset)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = message.get("headers", ())
+                if rate_limit_headers:
+                    # Rate-Limit-Header ersetzen statt duplizieren
+                    headers = [
+                        header for header in headers
+                        if header[0] not in _RATE_LIMIT_HEADER_NAMES
+                    ]
+                process_time = time.perf_counter() - start_time
+                message["headers"] = [
+                    *headers,
+                    *rate_limit_headers,
+                    (b"x-process-time", str(process_time).encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await app(scope, receive, send_wrapper)
+        except Exception as e:
+            process_time = time.perf_counter() - start_time
+            logger.error("❌ %s %s - Error: %s (%.3fs)", method, path, e, process_time)
+            raise
+
+        # Log response
+        process_time = time.perf_counter() - start_time
+        self._log_info("📤 %s %s - %s (%.3fs)", method, path, status_code, process_time)
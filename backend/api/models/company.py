@@ -4,11 +4,35 @@ Handles different businesses using the VocalIQ platform
 """
 
 from sqlmodel import SQLModel, Field, Column, JSON, Relationship
+from sqlalchemy import DDL, DateTime, Index, Text, event, func, text
+from sqlalchemy.orm import selectinload
+from sqlalchemy.dialects.postgresql import JSONB
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from enum import Enum
+import base64
+import secrets
 import uuid
 
+from api.models.database import PGPEncryptedString, lz4_compressed, requires_pgcrypto
+
+
+def _db_timestamp(on_update: bool = False) -> Any:
+    """Timestamp column filled by the database: now() on insert (and on update if requested)"""
+    column_kwargs: Dict[str, Any] = {"server_default": func.now()}
+    if on_update:
+        column_kwargs["onupdate"] = func.now()
+    return Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs=column_kwargs,
+        nullable=False,
+    )
+
+def generate_confirmation_code() -> str:
+    """8-char uppercase base32 code (40 random bits, no 0/1 lookalikes)"""
+    return base64.b32encode(secrets.token_bytes(5)).decode()
+
 class SubscriptionPlan(str, Enum):
     """Available subscription plans"""
     FREE = "free"
@@ -27,10 +51,21 @@ class Company(SQLModel, table=True):
     """
     Company/Tenant model
     Each company has its own voice agent configuration
+    
+    Hot JSON keys (BTREE expression index): settings->>'region'
     """
     __tablename__ = "companies"
-    
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
+    __table_args__ = (
+        # GIN (jsonb_path_ops) for containment filters: features @> '{"reservations": true}'
+        Index("ix_companies_features_gin", "features",
+              postgresql_using="gin", postgresql_ops={"features": "jsonb_path_ops"}),
+        # settings is only filtered on one scalar key - BTREE instead of GIN
+        Index("ix_companies_settings_region", text("(settings->>'region')")),
+    )
+    # RETURNING fetches server-generated timestamps; no lazy load (MissingGreenlet) after UPDATE
+    __mapper_args__ = {"eager_defaults": True}
+    
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     name: str = Field(index=True)
     slug: str = Field(unique=True, index=True)  # URL-friendly identifier
     
@@ -41,7 +76,10 @@ class Company(SQLModel, table=True):
     # Twilio Configuration
     twilio_phone_number: Optional[str] = None
     twilio_account_sid: Optional[str] = None
-    twilio_auth_token_encrypted: Optional[str] = None  # Encrypted!
+    # Plaintext in Python, pgcrypto-encrypted in the database; never serialized
+    twilio_auth_token_encrypted: Optional[str] = Field(
+        default=None, sa_column=Column(PGPEncryptedString), exclude=True
+    )
     
     # Voice Configuration
     voice_personality: VoicePersonality = Field(default=VoicePersonality.FRIENDLY)
@@ -61,22 +99,28 @@ class Company(SQLModel, table=True):
         "call_transfers": False,
         "sms_notifications": False,
         "email_notifications": False
-    }, sa_column=Column(JSON))
+    }, sa_column=Column(JSONB))
     
-    settings: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
+    settings: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSONB))
     
     # System Prompt Customization
     system_prompt_template: Optional[str] = Field(default=None, sa_column=Column(JSON))
     greeting_message: str = Field(default="Hello! Thank you for calling. How can I help you today?")
     
     # Metadata
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: Optional[datetime] = _db_timestamp()
+    updated_at: Optional[datetime] = _db_timestamp(on_update=True)
     is_active: bool = Field(default=True)
     
     # Relationships
-    knowledge_bases: List["KnowledgeBase"] = Relationship(back_populates="company")
-    intents: List["CompanyIntent"] = Relationship(back_populates="company")
+    # Small per-company collections are batch-loaded (one IN query per page of companies)
+    knowledge_bases: List["KnowledgeBase"] = Relationship(
+        back_populates="company", sa_relationship_kwargs={"lazy": "selectin"}
+    )
+    intents: List["CompanyIntent"] = Relationship(
+        back_populates="company", sa_relationship_kwargs={"lazy": "selectin"}
+    )
+    # Unbounded history stays lazy - load explicitly via with_company_history()
     appointments: List["Appointment"] = Relationship(back_populates="company")
     call_logs: List["CompanyCallLog"] = Relationship(back_populates="company")
 
@@ -86,9 +130,10 @@ class KnowledgeBase(SQLModel, table=True):
     Stores documents and FAQs for RAG
     """
     __tablename__ = "knowledge_bases"
+    __mapper_args__ = {"eager_defaults": True}
     
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
-    company_id: str = Field(foreign_key="companies.id", index=True)
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    company_id: uuid.UUID = Field(foreign_key="companies.id", index=True)
     
     # Weaviate Configuration
     weaviate_namespace: str = Field(unique=True)  # e.g., "Company_abc123"
@@ -96,7 +141,7 @@ class KnowledgeBase(SQLModel, table=True):
     # Statistics
     document_count: int = Field(default=0)
     total_chunks: int = Field(default=0)
-    last_updated: datetime = Field(default_factory=datetime.utcnow)
+    last_updated: Optional[datetime] = _db_timestamp(on_update=True)
     
     # Configuration
     embedding_model: str = Field(default="text-embedding-ada-002")
@@ -112,9 +157,10 @@ class Document(SQLModel, table=True):
     Individual documents in knowledge base
     """
     __tablename__ = "documents"
+    __mapper_args__ = {"eager_defaults": True}
     
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
-    knowledge_base_id: str = Field(foreign_key="knowledge_bases.id", index=True)
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    knowledge_base_id: uuid.UUID = Field(foreign_key="knowledge_bases.id", index=True)
     
     filename: str
     file_type: str  # pdf, docx, txt, html
@@ -126,29 +172,70 @@ class Document(SQLModel, table=True):
     
     # Metadata
     document_metadata: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
-    uploaded_at: datetime = Field(default_factory=datetime.utcnow)
+    uploaded_at: Optional[datetime] = _db_timestamp()
     processed_at: Optional[datetime] = None
     processing_status: str = Field(default="pending")  # pending, processing, completed, failed
     
     # Relationships
     knowledge_base: KnowledgeBase = Relationship(back_populates="documents")
 
+
+# KnowledgeBase.document_count / total_chunks are maintained by the database:
+# only completed documents count, so a failed upload never skews the stats
+KB_COUNTS_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION update_kb_counts() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' AND OLD.processing_status = 'completed' THEN
+        UPDATE knowledge_bases
+           SET document_count = document_count - 1,
+               total_chunks = total_chunks - OLD.chunk_count,
+               last_updated = now()
+         WHERE id = OLD.knowledge_base_id;
+    END IF;
+    IF TG_OP <> 'DELETE' AND NEW.processing_status = 'completed' THEN
+        UPDATE knowledge_bases
+           SET document_count = document_count + 1,
+               total_chunks = total_chunks + NEW.chunk_count,
+               last_updated = now()
+         WHERE id = NEW.knowledge_base_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+""")
+
+KB_COUNTS_TRIGGER = DDL("""
+CREATE TRIGGER docs_count_trg
+AFTER INSERT OR DELETE OR UPDATE OF processing_status, chunk_count, knowledge_base_id
+ON documents
+FOR EACH ROW EXECUTE FUNCTION update_kb_counts()
+""")
+
+event.listen(Document.__table__, "after_create", KB_COUNTS_FUNCTION.execute_if(dialect="postgresql"))
+event.listen(Document.__table__, "after_create", KB_COUNTS_TRIGGER.execute_if(dialect="postgresql"))
+
 class CompanyIntent(SQLModel, table=True):
     """
     Custom intents for each company
     Maps user intentions to actions
     """
     __tablename__ = "company_intents"
+    __table_args__ = (
+        Index("ix_company_intents_keywords_gin", "keywords",
+              postgresql_using="gin", postgresql_ops={"keywords": "jsonb_path_ops"}),
+        Index("ix_company_intents_example_phrases_gin", "example_phrases",
+              postgresql_using="gin", postgresql_ops={"example_phrases": "jsonb_path_ops"}),
+    )
     
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
-    company_id: str = Field(foreign_key="companies.id", index=True)
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    company_id: uuid.UUID = Field(foreign_key="companies.id", index=True)
     
     intent_name: str  # e.g., "make_reservation", "check_hours"
     description: Optional[str] = None
     
     # Recognition
-    keywords: List[str] = Field(default_factory=list, sa_column=Column(JSON))
-    example_phrases: List[str] = Field(default_factory=list, sa_column=Column(JSON))
+    keywords: List[str] = Field(default_factory=list, sa_column=Column(JSONB))
+    example_phrases: List[str] = Field(default_factory=list, sa_column=Column(JSONB))
     
     # Action Configuration
     action_type: str  # reservation, information, transfer, custom
@@ -167,9 +254,15 @@ class Appointment(SQLModel, table=True):
     Appointments/Reservations made through voice agent
     """
     __tablename__ = "appointments"
+    __table_args__ = (
+        # Partial index: runtime queries only look at confirmed appointments
+        Index("ix_appointments_company_active", "company_id", "scheduled_datetime",
+              postgresql_where=text("status = 'confirmed'")),
+    )
+    __mapper_args__ = {"eager_defaults": True}
     
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
-    company_id: str = Field(foreign_key="companies.id", index=True)
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    company_id: uuid.UUID = Field(foreign_key="companies.id", index=True)
     
     # Customer Information
     customer_phone: str = Field(index=True)
@@ -187,15 +280,15 @@ class Appointment(SQLModel, table=True):
     
     # Status
     status: str = Field(default="confirmed")  # confirmed, cancelled, completed, no_show
-    confirmation_code: str = Field(default_factory=lambda: str(uuid.uuid4())[:8].upper())
+    confirmation_code: str = Field(default_factory=generate_confirmation_code, unique=True)
     
     # Notifications
     reminder_sent: bool = Field(default=False)
     confirmation_sent: bool = Field(default=False)
     
     # Metadata
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: Optional[datetime] = _db_timestamp()
+    updated_at: Optional[datetime] = _db_timestamp(on_update=True)
     created_via: str = Field(default="voice")  # voice, web, api
     
     # Call Reference
@@ -209,9 +302,21 @@ class CompanyCallLog(SQLModel, table=True):
     Detailed call logs for analytics
     """
     __tablename__ = "company_call_logs"
-    
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
-    company_id: str = Field(foreign_key="companies.id", index=True)
+    __table_args__ = (
+        # GIN (jsonb_path_ops) for containment filters: keywords_extracted @> '["refund"]'
+        Index("ix_company_call_logs_intents_gin", "intents_detected",
+              postgresql_using="gin", postgresql_ops={"intents_detected": "jsonb_path_ops"}),
+        Index("ix_company_call_logs_keywords_gin", "keywords_extracted",
+              postgresql_using="gin", postgresql_ops={"keywords_extracted": "jsonb_path_ops"}),
+        # Action analytics: actions_taken @> '[{"type": "transfer"}]'
+        Index("ix_company_call_logs_actions_gin", "actions_taken",
+              postgresql_using="gin", postgresql_ops={"actions_taken": "jsonb_path_ops"}),
+        # Per-company call history ordered by start time
+        Index("ix_company_call_logs_company_started", "company_id", text("started_at DESC")),
+    )
+    
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    company_id: uuid.UUID = Field(foreign_key="companies.id")  # indexed via ix_company_call_logs_company_started
     
     # Call Information
     call_sid: str = Field(unique=True, index=True)
@@ -224,9 +329,9 @@ class CompanyCallLog(SQLModel, table=True):
     duration_seconds: Optional[int] = None
     
     # Conversation
-    transcript: Optional[str] = Field(default=None, sa_column=Column(JSON))
-    intents_detected: List[str] = Field(default_factory=list, sa_column=Column(JSON))
-    actions_taken: List[Dict[str, Any]] = Field(default_factory=list, sa_column=Column(JSON))
+    transcript: Optional[str] = Field(default=None, sa_column=Column(Text))
+    intents_detected: List[str] = Field(default_factory=list, sa_column=Column(JSONB))
+    actions_taken: List[Dict[str, Any]] = Field(default_factory=list, sa_column=Column(JSONB))
     
     # Outcome
     call_outcome: Optional[str] = None  # completed, transferred, voicemail, error
@@ -234,7 +339,7 @@ class CompanyCallLog(SQLModel, table=True):
     
     # Analytics
     sentiment_score: Optional[float] = None  # -1 to 1
-    keywords_extracted: List[str] = Field(default_factory=list, sa_column=Column(JSON))
+    keywords_extracted: List[str] = Field(default_factory=list, sa_column=Column(JSONB))
     
     # Cost
     twilio_cost: Optional[float] = None
@@ -242,4 +347,16 @@ class CompanyCallLog(SQLModel, table=True):
     elevenlabs_cost: Optional[float] = None
     
     # Relationships
-    company: Company = Relationship(back_populates="call_logs")
\ No newline at end of file
+    company: Company = Relationship(back_populates="call_logs")
+
+
+lz4_compressed(CompanyCallLog.__table__, "transcript")
+requires_pgcrypto(Company.__table__)
+
+
+def with_company_history(query):
+    """Eager-load appointments and call logs for a Company select (batched, no N+1)"""
+    return query.options(
+        selectinload(Company.appointments),
+        selectinload(Company.call_logs),
+    )
@@ -2,15 +2,19 @@
 VocalIQ Database Models
 SQLModel-basierte Entities für persistente Datenhaltung
 """
-from datetime import datetime, timezone
+from datetime import datetime
 from typing import Optional, List, Dict, Any
 from enum import Enum
 from sqlmodel import SQLModel, Field, Relationship, Column, JSON
+from sqlalchemy import DDL, DateTime, Index, Table, Text, TypeDecorator, bindparam, event, func, text, type_coerce
+from sqlalchemy.dialects.postgresql import BYTEA, JSONB
 # EmailStr removed - using str for SQLModel compatibility
 import uuid
+from uuid import UUID
 
 
 # Enums für verschiedene Status-Felder
+# PostgreSQL: native ENUM-Typen (Typname = Klassenname klein, gespeichert werden die Member-Namen)
 class UserRole(str, Enum):
     ADMIN = "admin"
     MANAGER = "manager"
@@ -45,26 +49,97 @@ class ConversationRole(str, Enum):
     SYSTEM = "system"
 
 
+def _supports_lz4(ddl, target, bind, **kw) -> bool:
+    # SET COMPRESSION gibt es erst ab PostgreSQL 14
+    return (bind.dialect.server_version_info or (0,)) >= (14,)
+
+
+def lz4_compressed(table: Table, *columns: str) -> None:
+    """Große Text-Spalten nach CREATE TABLE auf LZ4-TOAST-Kompression stellen"""
+    for column in columns:
+        event.listen(
+            table,
+            "after_create",
+            DDL(f"ALTER TABLE {table.name} ALTER COLUMN {column} SET COMPRESSION lz4")
+            .execute_if(dialect="postgresql", callable_=_supports_lz4),
+        )
+
+
+def _encryption_passphrase() -> str:
+    from api.core.config import get_settings
+    return get_settings().ENCRYPTION_KEY
+
+
+class PGPEncryptedString(TypeDecorator):
+    """
+    Text, den PostgreSQL per pgcrypto verschlüsselt ablegt (BYTEA).
+    Schreiben: pgp_sym_encrypt(value, key), Lesen: pgp_sym_decrypt(col, key) -
+    im Python-Code ist der Wert Klartext. Der Key geht pro Statement als
+    Bind-Parameter mit (nie als Session-Setting, das jede Abfrage lesen könnte);
+    er erscheint daher im Parameter-Log von DATABASE_ECHO.
+    """
+    impl = BYTEA
+    cache_ok = True
+
+    @staticmethod
+    def _key():
+        # callable_: Wert erst bei der Ausführung holen, nicht im Statement-Cache
+        return bindparam(None, callable_=_encryption_passphrase, type_=Text)
+
+    def bind_expression(self, bindvalue):
+        # Bind als Text, sonst castet asyncpg auf BYTEA und es gibt kein
+        # pgp_sym_encrypt(bytea, text)
+        return func.pgp_sym_encrypt(type_coerce(bindvalue, Text), self._key())
+
+    def column_expression(self, col):
+        return func.pgp_sym_decrypt(col, self._key(), type_=Text)
+
+
+def requires_pgcrypto(table: Table) -> None:
+    """pgcrypto-Extension vor CREATE TABLE sicherstellen"""
+    event.listen(
+        table,
+        "before_create",
+        DDL("CREATE EXTENSION IF NOT EXISTS pgcrypto").execute_if(dialect="postgresql"),
+    )
+
+
 # Base Model mit gemeinsamen Feldern
 class TimestampMixin(SQLModel):
-    """Mixin für Timestamp-Felder"""
-    created_at: datetime = Field(
-        default_factory=lambda: datetime.now(timezone.utc),
+    """Mixin für Timestamp-Felder (von der Datenbank gesetzt: now() bei INSERT/UPDATE)"""
+    # Server-Werte per RETURNING direkt laden - sonst ist updated_at nach einem
+    # UPDATE abgelaufen und der Zugriff löst unter AsyncSession einen Lazy-Load aus
+    __mapper_args__ = {"eager_defaults": True}
+    
+    created_at: Optional[datetime] = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now()},
+        nullable=False,
         description="Creation timestamp"
     )
     updated_at: Optional[datetime] = Field(
         default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"onupdate": func.now()},
         description="Last update timestamp"
     )
 
 
 # Organization Entity
 class Organization(TimestampMixin, table=True):
-    """Organization/Unternehmen Entity"""
+    """
+    Organization/Unternehmen Entity
+    
+    Hot JSON-Keys (BTREE-Expression-Index): features->>'tier'
+    """
     __tablename__ = "organizations"
+    __table_args__ = (
+        Index("ix_organizations_features_tier", text("(features->>'tier')")),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
-    uuid: str = Field(default_factory=lambda: str(uuid.uuid4()), unique=True, index=True)
+    uuid: UUID = Field(default_factory=uuid.uuid4, unique=True, index=True)
     
     name: str = Field(max_length=200, description="Organization name")
     slug: str = Field(max_length=100, unique=True, index=True, description="URL-friendly identifier")
@@ -88,7 +163,7 @@ class Organization(TimestampMixin, table=True):
     language: str = Field(default="de", max_length=5, description="Primary language")
     
     # Features
-    features: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON), description="Organization features and settings")
+    features: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSONB), description="Organization features and settings")
     
     # Subscription & Billing
     subscription_plan: str = Field(default="free", max_length=50)
@@ -99,7 +174,9 @@ class Organization(TimestampMixin, table=True):
     is_active: bool = Field(default=True)
     
     # Relationships
-    users: List["User"] = Relationship(back_populates="organization")
+    users: List["User"] = Relationship(
+        back_populates="organization", sa_relationship_kwargs={"lazy": "selectin"}
+    )
     phone_numbers: List["PhoneNumber"] = Relationship(back_populates="organization")
     call_logs: List["CallLog"] = Relationship(back_populates="organization")
 
@@ -108,9 +185,20 @@ class Organization(TimestampMixin, table=True):
 class User(TimestampMixin, table=True):
     """User Entity"""
     __tablename__ = "users"
+    __table_args__ = (
+        # GIN (jsonb_path_ops) für Containment-Filter: permissions @> '["x"]'
+        Index("ix_users_permissions_gin", "permissions",
+              postgresql_using="gin", postgresql_ops={"permissions": "jsonb_path_ops"}),
+        # Feature-Flags: preferences @> '{"beta_voice": true}'
+        Index("ix_users_preferences_gin", "preferences",
+              postgresql_using="gin", postgresql_ops={"preferences": "jsonb_path_ops"}),
+        # Partieller Index nur über aktive User (Enum wird per Name gespeichert)
+        Index("ix_users_org_active", "organization_id",
+              postgresql_where=text("status = 'ACTIVE'")),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
-    uuid: str = Field(default_factory=lambda: str(uuid.uuid4()), unique=True, index=True)
+    uuid: UUID = Field(default_factory=uuid.uuid4, unique=True, index=True)
     
     # Organization relationship
     organization_id: Optional[int] = Field(default=None, foreign_key="organizations.id")
@@ -133,7 +221,7 @@ class User(TimestampMixin, table=True):
     
     # Role & Permissions
     role: UserRole = Field(default=UserRole.USER, description="User role")
-    permissions: List[str] = Field(default_factory=list, sa_column=Column(JSON), description="Specific permissions")
+    permissions: List[str] = Field(default_factory=list, sa_column=Column(JSONB), description="Specific permissions")
     
     # Status
     status: UserStatus = Field(default=UserStatus.ACTIVE)
@@ -143,7 +231,7 @@ class User(TimestampMixin, table=True):
     # Settings
     language: str = Field(default="de", max_length=5)
     timezone: str = Field(default="Europe/Berlin", max_length=50)
-    preferences: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON), description="User preferences")
+    preferences: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSONB), description="User preferences")
     
     # Activity tracking
     last_login_at: Optional[datetime] = Field(default=None)
@@ -159,9 +247,14 @@ class User(TimestampMixin, table=True):
 class PhoneNumber(TimestampMixin, table=True):
     """Phone Number Entity für Twilio Integration"""
     __tablename__ = "phone_numbers"
+    __table_args__ = (
+        # Partieller Index nur über aktive Nummern
+        Index("ix_phone_numbers_org_active", "organization_id",
+              postgresql_where=text("is_active")),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
-    uuid: str = Field(default_factory=lambda: str(uuid.uuid4()), unique=True, index=True)
+    uuid: UUID = Field(default_factory=uuid.uuid4, unique=True, index=True)
     
     # Organization
     organization_id: int = Field(foreign_key="organizations.id")
@@ -200,11 +293,21 @@ class PhoneNumber(TimestampMixin, table=True):
 
 # Call Log Entity
 class CallLog(TimestampMixin, table=True):
-    """Call Log Entity für alle Anruf-Daten"""
+    """
+    Call Log Entity für alle Anruf-Daten
+    
+    Hot JSON-Keys (BTREE-Expression-Index): quality_issues->>'codec'
+    """
     __tablename__ = "call_logs"
+    __table_args__ = (
+        Index("ix_call_logs_quality_issues_codec", text("(quality_issues->>'codec')")),
+        # Dashboard-Abfragen (pro Organisation, nach Startzeit) als Index-Only-Scan
+        Index("ix_call_logs_org_start", "organization_id", text("start_time DESC"),
+              postgresql_include=["duration_seconds", "status", "cost"]),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
-    uuid: str = Field(default_factory=lambda: str(uuid.uuid4()), unique=True, index=True)
+    uuid: UUID = Field(default_factory=uuid.uuid4, unique=True, index=True)
     
     # Relationships
     organization_id: int = Field(foreign_key="organizations.id")
@@ -240,9 +343,9 @@ class CallLog(TimestampMixin, table=True):
     recording_duration: Optional[int] = Field(default=None, description="Recording duration in seconds")
     
     # AI Processing
-    transcription: Optional[str] = Field(default=None, description="Call transcription")
+    transcription: Optional[str] = Field(default=None, sa_type=Text, description="Call transcription")
     transcription_confidence: Optional[float] = Field(default=None, description="Transcription confidence score")
-    ai_summary: Optional[str] = Field(default=None, description="AI-generated call summary")
+    ai_summary: Optional[str] = Field(default=None, sa_type=Text, description="AI-generated call summary")
     sentiment_score: Optional[float] = Field(default=None, description="Call sentiment analysis score")
     
     # Business Data
@@ -262,7 +365,12 @@ class CallLog(TimestampMixin, table=True):
     user_agent: Optional[str] = Field(default=None, max_length=200, description="SIP User-Agent")
     
     # Relationships
-    conversations: List["Conversation"] = Relationship(back_populates="call_log")
+    conversations: List["Conversation"] = Relationship(
+        back_populates="call_log", sa_relationship_kwargs={"lazy": "selectin"}
+    )
+
+
+lz4_compressed(CallLog.__table__, "transcription", "ai_summary")
 
 
 # Conversation Entity (für AI-Chat-Verlauf)
@@ -271,7 +379,7 @@ class Conversation(TimestampMixin, table=True):
     __tablename__ = "conversations"
     
     id: Optional[int] = Field(default=None, primary_key=True)
-    uuid: str = Field(default_factory=lambda: str(uuid.uuid4()), unique=True, index=True)
+    uuid: UUID = Field(default_factory=uuid.uuid4, unique=True, index=True)
     
     # Relationships
     user_id: Optional[int] = Field(default=None, foreign_key="users.id")
@@ -291,7 +399,7 @@ class Conversation(TimestampMixin, table=True):
     
     # Message Content
     role: ConversationRole = Field(description="Message role")
-    content: str = Field(description="Message content")
+    content: str = Field(sa_type=Text, description="Message content")
     
     # Metadata
     tokens_used: Optional[int] = Field(default=None, description="Tokens consumed")
@@ -311,13 +419,21 @@ class Conversation(TimestampMixin, table=True):
     sequence_number: int = Field(description="Message sequence in conversation")
 
 
+lz4_compressed(Conversation.__table__, "content")
+
+
 # Analytics/Metrics Entity
 class CallAnalytics(TimestampMixin, table=True):
     """Call Analytics Entity für Reporting"""
     __tablename__ = "call_analytics"
+    __table_args__ = (
+        # Dashboards: organization_id = ? AND date BETWEEN ? AND ? (Range-Scan)
+        Index("ix_call_analytics_org_date", "organization_id", "date"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
-    uuid: str = Field(default_factory=lambda: str(uuid.uuid4()), unique=True, index=True)
+    # Rollup-Zeilen werden nur über id gelesen - kein eigener uuid-Index
+    uuid: UUID = Field(default_factory=uuid.uuid4)
     
     # Time dimensions
     date: datetime = Field(index=True, description="Analytics date")
@@ -328,7 +444,7 @@ class CallAnalytics(TimestampMixin, table=True):
     year: int = Field(description="Year")
     
     # Organization
-    organization_id: int = Field(foreign_key="organizations.id", index=True)
+    organization_id: int = Field(foreign_key="organizations.id")
     
     # Metrics
     total_calls: int = Field(default=0, description="Total calls")
@@ -365,9 +481,14 @@ class CallAnalytics(TimestampMixin, table=True):
 class APIKey(TimestampMixin, table=True):
     """API Keys Entity für externe Service-Integrationen"""
     __tablename__ = "api_keys"
+    __table_args__ = (
+        # Partieller Index für den Key-Lookup pro Service (nur aktive Keys)
+        Index("ix_api_keys_org_active", "organization_id", "service_name",
+              postgresql_where=text("is_active")),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
-    uuid: str = Field(default_factory=lambda: str(uuid.uuid4()), unique=True, index=True)
+    uuid: UUID = Field(default_factory=uuid.uuid4, unique=True, index=True)
     
     # Organization
     organization_id: int = Field(foreign_key="organizations.id", index=True)
@@ -375,7 +496,12 @@ class APIKey(TimestampMixin, table=True):
     # Key Details
     service_name: str = Field(max_length=50, description="Service name (twilio, openai, elevenlabs)")
     key_name: str = Field(max_length=100, description="Key identifier")
-    encrypted_key: str = Field(description="Encrypted API key")
+    # Klartext zuweisen - pgcrypto verschlüsselt in der DB; nie serialisieren
+    encrypted_key: str = Field(
+        sa_column=Column(PGPEncryptedString, nullable=False),
+        exclude=True,
+        description="API key (stored pgcrypto-encrypted)"
+    )
     
     # Configuration
     environment: str = Field(default="production", max_length=20, description="Environment (dev/staging/prod)")
@@ -390,6 +516,9 @@ class APIKey(TimestampMixin, table=True):
     key_metadata: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON), description="Additional key metadata")
 
 
+requires_pgcrypto(APIKey.__table__)
+
+
 # System Configuration Entity
 class SystemConfig(TimestampMixin, table=True):
     """System Configuration Entity"""
@@ -8,6 +8,7 @@ from enum import Enum
 from sqlmodel import SQLModel, Field, Relationship, Column, JSON
 from pydantic import EmailStr
 import uuid
+from uuid import UUID
 
 
 class LeadStatus(str, Enum):
@@ -45,7 +46,7 @@ class Lead(SQLModel, table=True):
     
     # Primary Key
     id: Optional[int] = Field(default=None, primary_key=True)
-    uuid: str = Field(default_factory=lambda: str(uuid.uuid4()), unique=True, index=True)
+    uuid: UUID = Field(default_factory=uuid.uuid4, unique=True, index=True)
     
     # Organization
     organization_id: int = Field(foreign_key="organizations.id", index=True)
@@ -143,7 +144,7 @@ class FollowUp(SQLModel, table=True):
     __tablename__ = "follow_ups"
     
     id: Optional[int] = Field(default=None, primary_key=True)
-    uuid: str = Field(default_factory=lambda: str(uuid.uuid4()), unique=True, index=True)
+    uuid: UUID = Field(default_factory=uuid.uuid4, unique=True, index=True)
     
     # Lead Relationship
     lead_id: int = Field(foreign_key="leads.id", index=True)
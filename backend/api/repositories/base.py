@@ -68,11 +68,6 @@ class BaseRepository(Generic[ModelType], ABC):
         if not update_data:
             return await self.get_by_id(id)
         
-        # Add updated_at timestamp if model has it
-        if hasattr(self.model, 'updated_at'):
-            from datetime import datetime, timezone
-            update_data['updated_at'] = datetime.now(timezone.utc)
-        
         await self.session.execute(
             update(self.model)
             .where(self.model.id == id)
@@ -7,12 +7,16 @@ from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime, timezone, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_, func, desc, asc
+from sqlalchemy.orm import defer
 
 from api.models.database import CallLog, CallStatus, CallDirection, CallAnalytics
 from api.repositories.base import BaseRepository
 
 logger = logging.getLogger(__name__)
 
+# Große Textspalten, die Übersichtslisten nicht brauchen (erst bei Zugriff per Einzel-Query laden)
+_DEFER_CALL_TEXT = (defer(CallLog.transcription), defer(CallLog.ai_summary))
+
 
 class CallRepository(BaseRepository[CallLog]):
     """Repository für CallLog-Entity"""
@@ -141,7 +145,7 @@ class CallRepository(BaseRepository[CallLog]):
         if direction:
             query = query.where(CallLog.direction == direction)
         
-        query = query.order_by(desc(CallLog.created_at)).offset(offset).limit(limit)
+        query = query.options(*_DEFER_CALL_TEXT).order_by(desc(CallLog.created_at)).offset(offset).limit(limit)
         
         result = await self.session.execute(query)
         return result.scalars().all()
@@ -155,7 +159,7 @@ class CallRepository(BaseRepository[CallLog]):
         if organization_id:
             query = query.where(CallLog.organization_id == organization_id)
         
-        query = query.order_by(desc(CallLog.created_at))
+        query = query.options(*_DEFER_CALL_TEXT).order_by(desc(CallLog.created_at))
         
         result = await self.session.execute(query)
         return result.scalars().all()
@@ -396,7 +400,7 @@ class CallRepository(BaseRepository[CallLog]):
                 CallLog.organization_id == organization_id,
                 CallLog.follow_up_required == True
             )
-        ).order_by(desc(CallLog.created_at)).offset(offset).limit(limit)
+        ).options(*_DEFER_CALL_TEXT).order_by(desc(CallLog.created_at)).offset(offset).limit(limit)
         
         result = await self.session.execute(query)
         return result.scalars().all()
\ No newline at end of file
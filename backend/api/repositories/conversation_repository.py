@@ -0,0 +1,139 @@
+"""
+Conversation Repository für VocalIQ
+Datenzugriff für Conversation-Entities (Chat-/Gesprächsverlauf)
+"""
+import asyncio
+import logging
+import uuid
+from typing import Optional, List, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from api.core.database import get_session_context
+from api.models.database import Conversation, ConversationRole
+from api.repositories.base import BaseRepository
+
+logger = logging.getLogger(__name__)
+
+# Nachrichten pro Batch-INSERT während eines laufenden Anrufs
+MESSAGE_FLUSH_SIZE = 16
+# Obergrenze des Puffers, falls die DB länger nicht erreichbar ist (älteste fallen weg)
+MESSAGE_BUFFER_LIMIT = 256
+# Wartezeit nach fehlgeschlagenem Flush (verdoppelt sich bis zum Maximum)
+FLUSH_BACKOFF_SECONDS = 1.0
+FLUSH_BACKOFF_MAX_SECONDS = 30.0
+
+
+class ConversationRepository(BaseRepository[Conversation]):
+    """Repository für Conversation-Entity"""
+
+    def __init__(self, session: AsyncSession):
+        super().__init__(session, Conversation)
+
+    async def bulk_insert_messages(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Insert many messages in one statement (multi-row VALUES).
+        ON CONFLICT (uuid) DO NOTHING macht Wiederholungen nach Fehlern idempotent.
+        """
+        if not rows:
+            return
+
+        stmt = insert(Conversation).on_conflict_do_nothing(index_elements=["uuid"])
+        await self.session.execute(stmt, rows)
+        await self.session.commit()
+
+    async def get_session_messages(self, session_id: str) -> List[Conversation]:
+        """Get all messages of a session in order"""
+        result = await self.session.execute(
+            select(Conversation)
+            .where(Conversation.session_id == session_id)
+            .order_by(Conversation.sequence_number)
+        )
+        return result.scalars().all()
+
+
+class ConversationMessageBuffer:
+    """
+    Puffert Nachrichten eines Gesprächs im Speicher und schreibt sie gebündelt
+    (alle MESSAGE_FLUSH_SIZE Nachrichten im Hintergrund und beim Gesprächsende
+    via close()). Nach Fehlern wird mit Backoff erneut versucht.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        model_name: str,
+        call_log_id: Optional[int] = None,
+        flush_size: int = MESSAGE_FLUSH_SIZE,
+        max_buffered: int = MESSAGE_BUFFER_LIMIT
+    ):
+        self.session_id = session_id
+        self.model_name = model_name
+        self.call_log_id = call_log_id
+        self.flush_size = flush_size
+        self.max_buffered = max_buffered
+        self._rows: List[Dict[str, Any]] = []
+        self._sequence = 0
+        self._lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._backoff = 0.0
+        self._retry_at = 0.0
+
+    async def add(self, role: ConversationRole, content: str) -> None:
+        """Buffer one message; a full batch is written by a background task"""
+        self._sequence += 1
+        self._rows.append({
+            # uuid wird hier vergeben, damit ein erneuter Flush dieselben Zeilen erkennt
+            "uuid": uuid.uuid4(),
+            "session_id": self.session_id,
+            "call_log_id": self.call_log_id,
+            "model_name": self.model_name,
+            "role": role,
+            "content": content,
+            "sequence_number": self._sequence,
+        })
+
+        if len(self._rows) > self.max_buffered:
+            dropped = len(self._rows) - self.max_buffered
+            del self._rows[:dropped]
+            logger.warning("Message buffer for %s full, dropped %d oldest messages", self.session_id, dropped)
+
+        if len(self._rows) >= self.flush_size and self._can_start_flush():
+            self._flush_task = asyncio.create_task(self.flush())
+
+    def _can_start_flush(self) -> bool:
+        if self._flush_task is not None and not self._flush_task.done():
+            return False
+        return asyncio.get_running_loop().time() >= self._retry_at
+
+    async def flush(self) -> None:
+        """Write buffered messages; on failure they stay buffered and retries back off"""
+        async with self._lock:
+            if not self._rows:
+                return
+
+            rows = list(self._rows)
+            try:
+                async with get_session_context() as session:
+                    await ConversationRepository(session).bulk_insert_messages(rows)
+            except Exception as e:
+                self._backoff = min(max(self._backoff * 2, FLUSH_BACKOFF_SECONDS), FLUSH_BACKOFF_MAX_SECONDS)
+                self._retry_at = asyncio.get_running_loop().time() + self._backoff
+                logger.error(
+                    "Failed to persist %d messages for %s (retry in %.0fs): %s",
+                    len(rows), self.session_id, self._backoff, e
+                )
+                return
+
+            self._backoff = 0.0
+            self._retry_at = 0.0
+            # Nur die geschriebenen Zeilen entfernen (bei Überlauf evtl. schon weg)
+            written = {row["uuid"] for row in rows}
+            self._rows = [row for row in self._rows if row["uuid"] not in written]
+
+    async def close(self) -> None:
+        """Laufenden Hintergrund-Flush abwarten und den Rest schreiben (ohne Backoff)"""
+        if self._flush_task is not None:
+            await self._flush_task
+        await self.flush()
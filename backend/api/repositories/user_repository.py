@@ -5,7 +5,7 @@ Datenzugriff für User-Entities
 import logging
 from typing import Optional, List, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
+from sqlalchemy import select, update, and_, or_, func
 from passlib.context import CryptContext
 
 from api.models.database import User, UserStatus
@@ -100,6 +100,35 @@ class UserRepository(BaseRepository[User]):
         result = await self.session.execute(query)
         return result.scalars().all()
     
+    async def get_users_with_permission(
+        self,
+        permission: str,
+        organization_id: Optional[int] = None
+    ) -> List[User]:
+        """Get users with a specific permission (permissions @> '["..."]', nutzt GIN-Index)"""
+        query = select(User).where(User.permissions.contains([permission]))
+        
+        if organization_id:
+            query = query.where(User.organization_id == organization_id)
+        
+        result = await self.session.execute(query)
+        return result.scalars().all()
+    
+    async def get_users_with_preference(
+        self,
+        key: str,
+        value: Any,
+        organization_id: Optional[int] = None
+    ) -> List[User]:
+        """Get users whose preferences contain key=value (preferences @> '{...}', nutzt GIN-Index)"""
+        query = select(User).where(User.preferences.contains({key: value}))
+        
+        if organization_id:
+            query = query.where(User.organization_id == organization_id)
+        
+        result = await self.session.execute(query)
+        return result.scalars().all()
+    
     async def search_users(
         self, 
         search_term: str,
@@ -128,17 +157,17 @@ class UserRepository(BaseRepository[User]):
         return result.scalars().all()
     
     async def update_last_login(self, user_id: int):
-        """Update user's last login timestamp"""
-        from datetime import datetime, timezone
-        
-        # Get current user first
-        user = await self.get_by_id(user_id)
-        if user:
-            await self.update(user_id, {
-                "last_login_at": datetime.now(timezone.utc),
-                "last_active_at": datetime.now(timezone.utc),
-                "login_count": user.login_count + 1
-            })
+        """Update user's last login timestamp (atomic increment, one statement)"""
+        await self.session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(
+                login_count=User.login_count + 1,
+                last_login_at=func.now(),
+                last_active_at=func.now()
+            )
+        )
+        await self.session.commit()
     
     async def update_last_active(self, user_id: int):
         """Update user's last active timestamp"""
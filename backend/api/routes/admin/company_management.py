@@ -5,15 +5,15 @@ Admin endpoints for managing multi-tenant companies
 
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Body
 from typing import List, Optional, Dict, Any
-from datetime import datetime
 import uuid
 
-from api.models.company import Company, KnowledgeBase, Document, CompanyIntent, Appointment
+from api.models.company import Company, KnowledgeBase, Document, CompanyIntent, Appointment, CompanyCallLog
 from api.models.auth import User
 from api.services.knowledge_service import KnowledgeService
 from api.services.auth_service import get_current_admin_user
 from api.core.database import get_session
 from sqlmodel import select, func
+from sqlalchemy.orm import defer
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/admin/companies", tags=["admin", "companies"])
@@ -99,7 +99,7 @@ async def list_companies(
 
 @router.get("/{company_id}", response_model=Company)
 async def get_company(
-    company_id: str,
+    company_id: uuid.UUID,
     current_user: User = Depends(get_current_admin_user)
 ):
     """
@@ -113,7 +113,7 @@ async def get_company(
 
 @router.patch("/{company_id}", response_model=Company)
 async def update_company(
-    company_id: str,
+    company_id: uuid.UUID,
     update_data: CompanyUpdate,
     current_user: User = Depends(get_current_admin_user)
 ):
@@ -129,7 +129,6 @@ async def update_company(
         for field, value in update_data.dict(exclude_unset=True).items():
             setattr(company, field, value)
         
-        company.updated_at = datetime.utcnow()
         session.add(company)
         await session.commit()
         await session.refresh(company)
@@ -138,7 +137,7 @@ async def update_company(
 
 @router.delete("/{company_id}")
 async def delete_company(
-    company_id: str,
+    company_id: uuid.UUID,
     current_user: User = Depends(get_current_admin_user)
 ):
     """
@@ -150,7 +149,6 @@ async def delete_company(
             raise HTTPException(404, "Company not found")
         
         company.is_active = False
-        company.updated_at = datetime.utcnow()
         session.add(company)
         await session.commit()
         
@@ -159,7 +157,7 @@ async def delete_company(
 # Knowledge Base endpoints
 @router.post("/{company_id}/knowledge/upload")
 async def upload_document(
-    company_id: str,
+    company_id: uuid.UUID,
     file: UploadFile = File(...),
     metadata: Optional[str] = Body(None),
     current_user: User = Depends(get_current_admin_user)
@@ -199,7 +197,7 @@ async def upload_document(
 
 @router.get("/{company_id}/knowledge/documents")
 async def list_documents(
-    company_id: str,
+    company_id: uuid.UUID,
     current_user: User = Depends(get_current_admin_user)
 ):
     """
@@ -210,6 +208,7 @@ async def list_documents(
             select(Document)
             .join(KnowledgeBase)
             .where(KnowledgeBase.company_id == company_id)
+            .options(defer(Document.original_text))  # listing never shows the text
         )
         documents = result.scalars().all()
         
@@ -228,8 +227,8 @@ async def list_documents(
 
 @router.delete("/{company_id}/knowledge/documents/{document_id}")
 async def delete_document(
-    company_id: str,
-    document_id: str,
+    company_id: uuid.UUID,
+    document_id: uuid.UUID,
     current_user: User = Depends(get_current_admin_user)
 ):
     """
@@ -242,6 +241,7 @@ async def delete_document(
             .join(KnowledgeBase)
             .where(Document.id == document_id)
             .where(KnowledgeBase.company_id == company_id)
+            .options(defer(Document.original_text))
         )
         document = result.scalar_one_or_none()
         
@@ -257,7 +257,7 @@ async def delete_document(
 # Intent Management
 @router.post("/{company_id}/intents", response_model=CompanyIntent)
 async def create_intent(
-    company_id: str,
+    company_id: uuid.UUID,
     intent_data: IntentCreate,
     current_user: User = Depends(get_current_admin_user)
 ):
@@ -283,7 +283,7 @@ async def create_intent(
 
 @router.get("/{company_id}/intents", response_model=List[CompanyIntent])
 async def list_intents(
-    company_id: str,
+    company_id: uuid.UUID,
     current_user: User = Depends(get_current_admin_user)
 ):
     """
@@ -301,7 +301,7 @@ async def list_intents(
 # Analytics
 @router.get("/{company_id}/analytics/overview")
 async def get_analytics_overview(
-    company_id: str,
+    company_id: uuid.UUID,
     current_user: User = Depends(get_current_admin_user)
 ):
     """
@@ -319,6 +319,18 @@ async def get_analytics_overview(
         )
         appointment_stats = appointment_result.first()
         
+        # Get call stats (transfers via actions_taken containment -> GIN index)
+        call_result = await session.execute(
+            select(
+                func.count(CompanyCallLog.id).label("total_calls"),
+                func.count(CompanyCallLog.id).filter(
+                    CompanyCallLog.actions_taken.contains([{"type": "transfer"}])
+                ).label("transferred")
+            )
+            .where(CompanyCallLog.company_id == company_id)
+        )
+        call_stats = call_result.first()
+        
         # Get knowledge base stats
         kb_result = await session.execute(
             select(KnowledgeBase)
@@ -332,6 +344,10 @@ async def get_analytics_overview(
                 "confirmed": appointment_stats.confirmed if appointment_stats else 0,
                 "cancelled": appointment_stats.cancelled if appointment_stats else 0
             },
+            "calls": {
+                "total": call_stats.total_calls if call_stats else 0,
+                "transferred": call_stats.transferred if call_stats else 0
+            },
             "knowledge_base": {
                 "document_count": knowledge_base.document_count if knowledge_base else 0,
                 "total_chunks": knowledge_base.total_chunks if knowledge_base else 0,
@@ -341,7 +357,7 @@ async def get_analytics_overview(
 
 @router.get("/{company_id}/appointments")
 async def list_appointments(
-    company_id: str,
+    company_id: uuid.UUID,
     skip: int = 0,
     limit: int = 50,
     status: Optional[str] = None,
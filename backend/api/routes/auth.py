@@ -89,8 +89,8 @@ async def login(
     client_ip = get_client_ip(request)
     
     # Rate-Limiting prüfen
-    if not SecurityManager.check_login_attempts(client_ip, login_data.username):
-        SecurityManager.record_login_attempt(client_ip, login_data.username, False)
+    if not await SecurityManager.check_login_attempts(client_ip, login_data.username):
+        await SecurityManager.record_login_attempt(client_ip, login_data.username, False)
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail=f"Too many login attempts. Try again in {settings.LOCKOUT_DURATION} seconds."
@@ -98,29 +98,28 @@ async def login(
     
     # TEMPORÄRE ADMIN-ANMELDUNG (bis User-System implementiert ist)
     if (login_data.username == settings.ADMIN_USERNAME and 
-        SecurityManager.verify_password(login_data.password, 
-                                      SecurityManager.hash_password(settings.ADMIN_PASSWORD))):
+        await SecurityManager.verify_password(login_data.password, 
+                                            await SecurityManager.hash_password(settings.ADMIN_PASSWORD))):
         
         # Erfolgreiche Admin-Anmeldung
-        SecurityManager.record_login_attempt(client_ip, login_data.username, True)
+        await SecurityManager.record_login_attempt(client_ip, login_data.username, True)
         
         # Token erstellen
         token_expires = timedelta(
             minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * (7 if login_data.remember_me else 1)
         )
         
-        access_token = SecurityManager.create_access_token(
+        access_token, refresh_token = await SecurityManager.create_token_pair(
             data={
                 "sub": login_data.username,
                 "user_id": 1,  # Admin-User ID
                 "organization_id": 1,  # Default Org
                 "scopes": ["admin", "user", "calls", "analytics"]
             },
+            user_id=1,
             expires_delta=token_expires
         )
         
-        refresh_token = SecurityManager.create_refresh_token(user_id=1)
-        
         return LoginResponse(
             access_token=access_token,
             refresh_token=refresh_token,
@@ -136,7 +135,7 @@ async def login(
         )
     
     # Login fehlgeschlagen
-    SecurityManager.record_login_attempt(client_ip, login_data.username, False)
+    await SecurityManager.record_login_attempt(client_ip, login_data.username, False)
     raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Incorrect username or password"
@@ -150,7 +149,7 @@ async def refresh_token(refresh_data: RefreshTokenRequest):
     """
     try:
         # Refresh Token verifizieren
-        payload = SecurityManager.verify_token(refresh_data.refresh_token)
+        payload = await SecurityManager.verify_token(refresh_data.refresh_token)
         
         if payload.type != "refresh":
             raise HTTPException(
@@ -159,12 +158,12 @@ async def refresh_token(refresh_data: RefreshTokenRequest):
             )
         
         # Neuen Access Token erstellen
-        access_token = SecurityManager.create_access_token(
+        access_token = await SecurityManager.create_access_token(
             data={
                 "sub": payload.sub,
                 "user_id": payload.user_id,
                 "organization_id": payload.organization_id,
-                "scopes": payload.scopes
+                "scopes": sorted(payload.scopes)
             }
         )
         
@@ -187,7 +186,7 @@ async def logout(token: TokenPayload = Depends(get_current_user_token)):
     Benutzer abmelden (Token revoken)
     """
     if token.jti:
-        SecurityManager.revoke_token(token.jti)
+        await SecurityManager.revoke_token(token.jti)
     
     return {"message": "Successfully logged out"}
 
@@ -232,9 +231,9 @@ async def change_password(
         )
     
     # Aktuelles Passwort prüfen
-    if not SecurityManager.verify_password(
+    if not await SecurityManager.verify_password(
         password_data.current_password,
-        SecurityManager.hash_password(settings.ADMIN_PASSWORD)
+        await SecurityManager.hash_password(settings.ADMIN_PASSWORD)
     ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -5,6 +5,7 @@ Shows persistent storage working with Users and Organizations
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+from uuid import UUID
 import logging
 
 from api.core.database import get_session
@@ -28,7 +29,7 @@ class CreateUserRequest(BaseModel):
 class UserSummary(BaseModel):
     """User Summary Response"""
     id: int
-    uuid: str
+    uuid: UUID
     email: str
     first_name: str
     last_name: str
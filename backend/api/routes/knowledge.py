@@ -1,7 +1,9 @@
 from typing import Any, Dict, Optional
+from uuid import UUID
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import defer
 
 from api.core.database import get_session
 from api.services.knowledge_service import KnowledgeService
@@ -37,7 +39,12 @@ async def _get_or_create_kb(session: AsyncSession, company: Company) -> Knowledg
 async def list_documents(session: AsyncSession = Depends(get_session)):
     try:
         company = await _get_or_create_default_company(session)
-        result = await session.execute(select(Document).join(KnowledgeBase).where(KnowledgeBase.company_id == company.id))
+        result = await session.execute(
+            select(Document)
+            .join(KnowledgeBase)
+            .where(KnowledgeBase.company_id == company.id)
+            .options(defer(Document.original_text))  # listing never shows the text
+        )
         docs = result.scalars().all()
         return [
             {
@@ -71,10 +78,12 @@ async def upload_document(file: UploadFile = File(...), session: AsyncSession =
 
 
 @router.delete("/documents/{document_id}")
-async def delete_document(document_id: str, session: AsyncSession = Depends(get_session)):
+async def delete_document(document_id: UUID, session: AsyncSession = Depends(get_session)):
     try:
         # Fetch document and KB
-        result = await session.execute(select(Document).where(Document.id == document_id))
+        result = await session.execute(
+            select(Document).where(Document.id == document_id).options(defer(Document.original_text))
+        )
         doc = result.scalar_one_or_none()
         if not doc:
             raise HTTPException(404, "Document not found")
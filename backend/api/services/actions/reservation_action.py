@@ -5,15 +5,17 @@ Handles restaurant table reservations through voice
 
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta, time
-import uuid
 import pytz
+from sqlalchemy.exc import IntegrityError
 
 from api.services.actions.base_action import BaseAction, ValidationError
-from api.models.company import Company, CompanyIntent, Appointment
+from api.models.company import Company, CompanyIntent, Appointment, generate_confirmation_code
 from api.core.database import get_session
 from api.services.notification_service import NotificationService
 from sqlmodel import select
 
+CONFIRMATION_CODE_ATTEMPTS = 3
+
 class ReservationAction(BaseAction):
     """
     Action for handling restaurant reservations
@@ -149,26 +151,7 @@ class ReservationAction(BaseAction):
             }
         
         # Create reservation
-        async with get_session() as session:
-            appointment = Appointment(
-                company_id=self.company.id,
-                customer_phone=parameters.get("customer_phone", "unknown"),
-                customer_name=parameters.get("customer_name"),
-                appointment_type="reservation",
-                scheduled_datetime=parameters["datetime"],
-                duration_minutes=120,  # Default 2 hour reservation
-                details={
-                    "party_size": parameters["party_size"],
-                    "seating_preference": parameters.get("seating_preference"),
-                    "special_requests": parameters.get("special_requests")
-                },
-                status="confirmed",
-                confirmation_code=self._generate_confirmation_code()
-            )
-            
-            session.add(appointment)
-            await session.commit()
-            await session.refresh(appointment)
+        appointment = await self._create_appointment(parameters)
         
         # Send confirmation
         if parameters.get("customer_phone"):
@@ -331,8 +314,36 @@ class ReservationAction(BaseAction):
         
         return alternatives
     
-    def _generate_confirmation_code(self) -> str:
+    async def _create_appointment(self, parameters: Dict[str, Any]) -> Appointment:
         """
-        Generate a unique confirmation code
+        Insert the reservation, retrying with a fresh confirmation code on a collision
         """
-        return str(uuid.uuid4())[:8].upper()
\ No newline at end of file
+        for attempt in range(CONFIRMATION_CODE_ATTEMPTS):
+            async with get_session() as session:
+                appointment = Appointment(
+                    company_id=self.company.id,
+                    customer_phone=parameters.get("customer_phone", "unknown"),
+                    customer_name=parameters.get("customer_name"),
+                    appointment_type="reservation",
+                    scheduled_datetime=parameters["datetime"],
+                    duration_minutes=120,  # Default 2 hour reservation
+                    details={
+                        "party_size": parameters["party_size"],
+                        "seating_preference": parameters.get("seating_preference"),
+                        "special_requests": parameters.get("special_requests")
+                    },
+                    status="confirmed",
+                    confirmation_code=generate_confirmation_code()
+                )
+                
+                session.add(appointment)
+                try:
+                    await session.commit()
+                except IntegrityError:
+                    # Unique confirmation_code collided (2^-40 per pair) - try a new code
+                    await session.rollback()
+                    if attempt == CONFIRMATION_CODE_ATTEMPTS - 1:
+                        raise
+                    continue
+                await session.refresh(appointment)
+                return appointment
\ No newline at end of file
@@ -6,7 +6,6 @@ Provides user authentication and authorization functions
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from sqlmodel import Session, select
-from jose import JWTError, jwt
 
 from api.core.config import get_settings
 from api.core.database import get_session
@@ -157,7 +156,7 @@ async def create_user(
             )
         
         # Hash password
-        hashed_password = SecurityManager.hash_password(password)
+        hashed_password = await SecurityManager.hash_password(password)
         
         # Create user
         user = User(
@@ -195,7 +194,7 @@ async def authenticate_user(username: str, password: str) -> Optional[User]:
             return None
         
         # Verify password
-        if not SecurityManager.verify_password(password, user.hashed_password):
+        if not await SecurityManager.verify_password(password, user.hashed_password):
             return None
         
         if not user.is_active:
@@ -219,11 +218,11 @@ async def update_user_password(
             return False
         
         # Verify current password
-        if not SecurityManager.verify_password(current_password, user.hashed_password):
+        if not await SecurityManager.verify_password(current_password, user.hashed_password):
             return False
         
         # Update password
-        user.hashed_password = SecurityManager.hash_password(new_password)
+        user.hashed_password = await SecurityManager.hash_password(new_password)
         session.add(user)
         await session.commit()
         
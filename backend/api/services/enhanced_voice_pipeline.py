@@ -7,9 +7,11 @@ import asyncio
 from typing import Dict, Optional, Any, Tuple
 from datetime import datetime, timezone
 from sqlmodel import select
+from api.core.config import get_settings
 from api.core.database import get_session_context
 from api.models.lead import Lead, LeadActivity, LeadStatus, LeadSource
-from api.models.database import CallLog, CallStatus, CallDirection
+from api.models.database import CallLog, CallStatus, CallDirection, ConversationRole
+from api.repositories.conversation_repository import ConversationMessageBuffer
 from api.services.voice_pipeline import VoicePipelineService
 from api.services.lead_scoring_service import LeadScoringService
 from api.services.lead_enrichment_service import LeadEnrichmentService
@@ -19,10 +21,12 @@ from api.config.agent_scripts import (
     ROUTING_KEYWORDS, 
     AGENT_SCRIPTS, 
     INTENT_PATTERNS,
-    generate_personalized_script
+    generate_personalized_script,
+    match_intents
 )
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 
 class EnhancedVoicePipeline(VoicePipelineService):
@@ -128,71 +132,86 @@ class EnhancedVoicePipeline(VoicePipelineService):
         if not session:
             return conversation_result
         
+        # Nachrichten gebündelt persistieren statt ein INSERT pro Nachricht
+        session['message_buffer'] = ConversationMessageBuffer(
+            session_id=session_id,
+            model_name=settings.OPENAI_MODEL,
+            call_log_id=call_log.id
+        )
+        
         start_time = datetime.now(timezone.utc)
         
-        while session.get('active', True):
-            try:
-                # Auf Nutzer-Input warten
-                user_input = await self._wait_for_user_input(session_id)
+        try:
+            while session.get('active', True):
+                try:
+                    # Auf Nutzer-Input warten
+                    user_input = await self._wait_for_user_input(session_id)
                 
-                if not user_input:
-                    continue
+                    if not user_input:
+                        continue
                 
-                conversation_result['transcript'].append({
-                    'role': 'user',
-                    'content': user_input,
-                    'timestamp': datetime.now(timezone.utc).isoformat()
-                })
+                    await self._record_message(
+                        session_id, conversation_result, ConversationRole.USER, user_input
+                    )
                 
-                # Intent erkennen
-                intent, confidence = await self._detect_intent(user_input)
-                logger.info(f"Intent erkannt: {intent} (Confidence: {confidence})")
+                    # Intent erkennen
+                    intent, confidence = await self._detect_intent(user_input)
+                    logger.info(f"Intent erkannt: {intent} (Confidence: {confidence})")
                 
-                # Routing-Entscheidung
-                routing_decision = await self._make_routing_decision(
-                    user_input=user_input,
-                    intent=intent,
-                    lead=lead
-                )
+                    # Routing-Entscheidung
+                    routing_decision = await self._make_routing_decision(
+                        user_input=user_input,
+                        intent=intent,
+                        lead=lead
+                    )
                 
-                if routing_decision['should_transfer']:
-                    # Kunde möchte zur Rezeption/Abteilung
-                    transfer_message = routing_decision['transfer_message']
-                    await self._send_tts_response(session_id, transfer_message)
+                    if routing_decision['should_transfer']:
+                        # Kunde möchte zur Rezeption/Abteilung
+                        transfer_message = routing_decision['transfer_message']
+                        await self._send_tts_response(session_id, transfer_message)
                     
-                    # Transfer durchführen
-                    conversation_result['routing_result'] = {
-                        'transferred_to': routing_decision['department'],
-                        'reason': routing_decision['reason']
-                    }
+                        # Transfer durchführen
+                        conversation_result['routing_result'] = {
+                            'transferred_to': routing_decision['department'],
+                            'reason': routing_decision['reason']
+                        }
                     
-                    # Session beenden
-                    session['active'] = False
+                        # Session beenden
+                        session['active'] = False
                     
-                elif routing_decision['offer_choice']:
-                    # Kunde die Wahl geben: KI oder Mensch
-                    choice_context = {
-                        'intent': intent,
-                        'department': routing_decision['suggested_department']
-                    }
-                    choice_message = generate_personalized_script(
-                        'hotel_receptionist.routing_decision',
-                        choice_context
-                    )
+                    elif routing_decision['offer_choice']:
+                        # Kunde die Wahl geben: KI oder Mensch
+                        choice_context = {
+                            'intent': intent,
+                            'department': routing_decision['suggested_department']
+                        }
+                        choice_message = generate_personalized_script(
+                            'hotel_receptionist.routing_decision',
+                            choice_context
+                        )
                     
-                    await self._send_tts_response(session_id, choice_message)
+                        await self._send_tts_response(session_id, choice_message)
                     
-                    # Auf Antwort warten
-                    choice_response = await self._wait_for_user_input(session_id)
+                        # Auf Antwort warten
+                        choice_response = await self._wait_for_user_input(session_id)
                     
-                    if 'verbind' in choice_response.lower() or 'rezeption' in choice_response.lower():
-                        # Transfer gewünscht
-                        transfer_message = ROUTING_KEYWORDS[routing_decision['suggested_department']]['transfer_message']
-                        await self._send_tts_response(session_id, transfer_message)
-                        conversation_result['routing_result'] = {'transferred_to': routing_decision['suggested_department']}
-                        session['active'] = False
+                        if 'verbind' in choice_response.lower() or 'rezeption' in choice_response.lower():
+                            # Transfer gewünscht
+                            transfer_message = ROUTING_KEYWORDS[routing_decision['suggested_department']]['transfer_message']
+                            await self._send_tts_response(session_id, transfer_message)
+                            conversation_result['routing_result'] = {'transferred_to': routing_decision['suggested_department']}
+                            session['active'] = False
+                        else:
+                            # KI soll helfen
+                            await self._handle_with_ai(
+                                session_id=session_id,
+                                intent=intent,
+                                user_input=user_input,
+                                lead=lead,
+                                conversation_result=conversation_result
+                            )
                     else:
-                        # KI soll helfen
+                        # Direkt mit KI bearbeiten
                         await self._handle_with_ai(
                             session_id=session_id,
                             intent=intent,
@@ -200,19 +219,14 @@ class EnhancedVoicePipeline(VoicePipelineService):
                             lead=lead,
                             conversation_result=conversation_result
                         )
-                else:
-                    # Direkt mit KI bearbeiten
-                    await self._handle_with_ai(
-                        session_id=session_id,
-                        intent=intent,
-                        user_input=user_input,
-                        lead=lead,
-                        conversation_result=conversation_result
-                    )
                 
-            except Exception as e:
-                logger.error(f"Fehler in Conversation Loop: {str(e)}")
-                break
+                except Exception as e:
+                    logger.error(f"Fehler in Conversation Loop: {str(e)}")
+                    break
+        
+        finally:
+            # Restliche Nachrichten auch bei Abbruch/Disconnect schreiben
+            await asyncio.shield(session['message_buffer'].close())
         
         # Gesprächsdauer berechnen
         end_time = datetime.now(timezone.utc)
@@ -220,6 +234,26 @@ class EnhancedVoicePipeline(VoicePipelineService):
         
         return conversation_result
     
+    async def _record_message(
+        self,
+        session_id: str,
+        conversation_result: Dict,
+        role: ConversationRole,
+        content: str
+    ):
+        """
+        Nachricht ins Transkript übernehmen und für den Batch-INSERT puffern
+        """
+        conversation_result['transcript'].append({
+            'role': role.value,
+            'content': content,
+            'timestamp': datetime.now(timezone.utc).isoformat()
+        })
+        
+        message_buffer = self.sessions.get(session_id, {}).get('message_buffer')
+        if message_buffer:
+            await message_buffer.add(role, content)
+    
     async def _detect_intent(self, user_input: str) -> Tuple[str, float]:
         """
         Erkennt die Absicht des Anrufers mittels GPT-4
@@ -270,11 +304,13 @@ class EnhancedVoicePipeline(VoicePipelineService):
         """
         Entscheidet ob und wohin geroutet werden soll
         """
-        user_input_lower = user_input.lower()
+        match = match_intents(user_input, 'routing')
         
-        # Notfall-Check (SOFORT weiterleiten)
-        for keyword in ROUTING_KEYWORDS['emergency']['keywords']:
-            if keyword in user_input_lower:
+        if match:
+            dept, keyword = match
+            
+            # Notfall-Check (SOFORT weiterleiten)
+            if dept == 'emergency':
                 return {
                     'should_transfer': True,
                     'department': 'emergency',
@@ -282,22 +318,15 @@ class EnhancedVoicePipeline(VoicePipelineService):
                     'reason': 'Notfall erkannt',
                     'offer_choice': False
                 }
-        
-        # Department-spezifische Keywords prüfen
-        for dept, config in ROUTING_KEYWORDS.items():
-            if dept == 'emergency':
-                continue
-                
-            for keyword in config['keywords']:
-                if keyword in user_input_lower:
-                    # Bei normalen Anfragen: Wahl anbieten
-                    return {
-                        'should_transfer': False,
-                        'offer_choice': True,
-                        'suggested_department': dept,
-                        'department': config['department'],
-                        'reason': f'Keyword "{keyword}" erkannt'
-                    }
+            
+            # Bei normalen Anfragen: Wahl anbieten
+            return {
+                'should_transfer': False,
+                'offer_choice': True,
+                'suggested_department': dept,
+                'department': ROUTING_KEYWORDS[dept]['department'],
+                'reason': f'Keyword "{keyword}" erkannt'
+            }
         
         # Intent-basierte Entscheidung
         if intent == 'booking':
@@ -340,11 +369,9 @@ class EnhancedVoicePipeline(VoicePipelineService):
         ai_response = await self._generate_ai_response(user_input, context)
         
         # Response speichern
-        conversation_result['transcript'].append({
-            'role': 'assistant',
-            'content': ai_response,
-            'timestamp': datetime.now(timezone.utc).isoformat()
-        })
+        await self._record_message(
+            session_id, conversation_result, ConversationRole.ASSISTANT, ai_response
+        )
         
         # TTS und abspielen
         await self._send_tts_response(session_id, ai_response)
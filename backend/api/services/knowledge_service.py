@@ -65,7 +65,7 @@ class KnowledgeService:
         Create a new knowledge base for a company
         """
         # Generate unique namespace
-        namespace = f"Company_{company.id.replace('-', '_')}"
+        namespace = f"Company_{str(company.id).replace('-', '_')}"
         
         # Create Weaviate schema for this company
         if self.weaviate_client:
@@ -174,7 +174,7 @@ class KnowledgeService:
                             break
                         obj = {
                             "content": chunk,
-                            "document_id": document.id,
+                            "document_id": str(document.id),
                             "document_name": document.filename,
                             "chunk_index": i,
                             "metadata": json.dumps(document.document_metadata),
@@ -202,14 +202,7 @@ class KnowledgeService:
                 document.processed_at = datetime.utcnow()
                 document.processing_status = "completed"
                 session.add(document)
-                
-                # Update knowledge base stats
-                kb = await session.get(KnowledgeBase, knowledge_base.id)
-                kb.document_count += 1
-                kb.total_chunks += document.chunk_count
-                kb.last_updated = datetime.utcnow()
-                session.add(kb)
-                
+                # knowledge base stats are updated by the docs_count_trg trigger
                 await session.commit()
                 
             logger.info(f"Successfully processed document {document.filename} with {document.chunk_count} chunks")
@@ -342,7 +335,7 @@ class KnowledgeService:
                     "document": doc.filename,
                     "chunk_index": 0,
                     "relevance_score": round(min(score, 1.0), 4),
-                    "metadata": {"document_id": doc.id, "match_index": idx, "occurrences": freq},
+                    "metadata": {"document_id": str(doc.id), "match_index": idx, "occurrences": freq},
                 })
         # Sort and limit
         results.sort(key=lambda r: r["relevance_score"], reverse=True)
@@ -363,18 +356,12 @@ class KnowledgeService:
                 where={
                     "path": ["document_id"],
                     "operator": "Equal",
-                    "valueString": document.id,
+                    "valueString": str(document.id),
                 },
             )
         
-        # Update knowledge base stats
+        # Delete document record (docs_count_trg updates the knowledge base stats)
         async with get_session_context() as session:
-            kb.document_count -= 1
-            kb.total_chunks -= document.chunk_count
-            kb.last_updated = datetime.utcnow()
-            session.add(kb)
-            
-            # Delete document record
             await session.delete(document)
             await session.commit()
     
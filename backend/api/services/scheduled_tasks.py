@@ -114,8 +114,9 @@ class ScheduledTasksService:
             
             for org in organizations:
                 # Prüfe ob Feature verfügbar
-                if not SubscriptionService.has_feature(
-                    org.subscription_plan,
+                plan = SubscriptionService.parse_plan(org.subscription_plan)
+                if plan is None or not SubscriptionService.has_feature(
+                    plan,
                     Feature.AUTO_FOLLOW_UP
                 ):
                     continue
@@ -176,8 +177,9 @@ class ScheduledTasksService:
             
             for org in organizations:
                 # Prüfe ob Feature verfügbar
-                if not SubscriptionService.has_feature(
-                    org.subscription_plan,
+                plan = SubscriptionService.parse_plan(org.subscription_plan)
+                if plan is None or not SubscriptionService.has_feature(
+                    plan,
                     Feature.LEAD_REACTIVATION
                 ):
                     continue
@@ -0,0 +1,28 @@
+"""PGPEncryptedString must compile to valid pgcrypto calls under asyncpg"""
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects.postgresql.asyncpg import PGDialect_asyncpg
+
+from api.core.config import get_settings
+from api.models.company import Company
+from api.models.database import APIKey
+
+
+def _compile(stmt):
+    return stmt.compile(dialect=PGDialect_asyncpg())
+
+
+def test_insert_binds_plaintext_as_text():
+    compiled = _compile(insert(Company).values(name="a", slug="a", twilio_auth_token_encrypted="secret"))
+    assert "pgp_sym_encrypt($5::VARCHAR, $6::VARCHAR)" in str(compiled)
+    assert "::BYTEA" not in str(compiled)
+
+
+def test_update_binds_plaintext_as_text():
+    compiled = _compile(update(APIKey).values(encrypted_key="secret"))
+    assert "pgp_sym_encrypt($1::VARCHAR, $2::VARCHAR)" in str(compiled)
+
+
+def test_key_is_bound_per_statement():
+    compiled = _compile(select(APIKey.encrypted_key))
+    assert "pgp_sym_decrypt(api_keys.encrypted_key, $1::VARCHAR)" in str(compiled)
+    assert get_settings().ENCRYPTION_KEY in compiled.construct_params().values()